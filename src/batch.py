@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+import argparse
+import math
+
+import numpy as np
+
+from board import initialBoard, Horse, Trainer, VeterinaryCheckup, SuspensionField, \
+    STABLE_SIZES, SUSPENSION_INDEX
+from game import Game, MAX_ROUNDS
+from player import Player
+from strategies import ThresholdStrategy, ScoreStrategy, NoCheapHorsesStrategy, \
+    DecisionRequests, PROPERTY, RACE, can_decide_in_batches
+import logger
+
+STARTING_MONEY = 30000
+BANK_MONEY = 200000
+START_BONUS = 4000
+
+# kinds of fields
+NOTHING = 0
+HORSE = 1
+TRAINER = 2
+VETERINARY_CHECKUP = 3
+SUSPENSION = 4
+
+NUMBER_OF_FIELDS = len(initialBoard)
+FIELD_KINDS = np.zeros(NUMBER_OF_FIELDS, np.int64)
+PRICES = np.zeros(NUMBER_OF_FIELDS, np.int64)
+NEW_RACE_PRICES = np.zeros(NUMBER_OF_FIELDS, np.int64)
+STABLES = np.zeros(NUMBER_OF_FIELDS, np.int64)
+ADMISSIONS = np.zeros((NUMBER_OF_FIELDS, 6), np.int64)
+FEES = np.zeros(NUMBER_OF_FIELDS, np.int64)
+for _field in initialBoard:
+    if isinstance(_field, Horse):
+        FIELD_KINDS[_field.index] = HORSE
+        PRICES[_field.index] = _field.price
+        NEW_RACE_PRICES[_field.index] = _field.new_race_price
+        STABLES[_field.index] = _field.stable
+        ADMISSIONS[_field.index] = _field.admissions
+    elif isinstance(_field, Trainer):
+        FIELD_KINDS[_field.index] = TRAINER
+        PRICES[_field.index] = _field.price
+    elif isinstance(_field, VeterinaryCheckup):
+        FIELD_KINDS[_field.index] = VETERINARY_CHECKUP
+        FEES[_field.index] = _field.fee
+    elif isinstance(_field, SuspensionField):
+        FIELD_KINDS[_field.index] = SUSPENSION
+STABLE_SIZE_TABLE = np.array([STABLE_SIZES[stable] for stable in range(len(STABLE_SIZES))])
+TRAINER_ADMISSIONS = np.array((0,) + Trainer.ADMISSIONS)  # indexed by the number of trainers
+
+
+def is_batch_expressible(strategies):
+    """
+    Whether all the strategies can be simulated by BatchSimulator
+    (they can make their decisions in batches).
+    :param strategies: list of strategies
+    """
+    return all(can_decide_in_batches(strategy) for strategy in strategies)
+
+
+class BatchSimulator:
+    """
+    A simulator of many games at once.
+    The state of all the games is held in NumPy arrays (one row per game)
+    and every turn is played in all the running games at once.
+    The decisions of a turn are collected from all the games and every strategy
+    makes its ones in a single call of Strategy.decide_batch (the decisions of all
+    the threshold strategies are made by a single comparison).
+    The rules are the same as in Game, including the order of turns
+    (the player seated after a player who went bankrupt loses his turn
+    in that round, as Game removes players while iterating over them).
+    Dice are thrown in bulk, so the games are not the same as the games
+    of Game with the same seed, only statistically equivalent.
+    """
+
+    def __init__(self, strategies, rng: np.random.Generator, max_rounds=MAX_ROUNDS):
+        """
+        :param strategies: strategy of every player (implementing decide_batch)
+        :param rng: NumPy random generator
+        :param max_rounds: number of rounds after which the game is a tie
+        """
+        self.strategies = list(strategies)
+        self.number_of_players = len(self.strategies)
+        is_threshold = [type(strategy) is ThresholdStrategy for strategy in self.strategies]
+        self.thresholds = np.array([strategy.threshold if threshold else 0
+                                    for strategy, threshold in zip(self.strategies, is_threshold)],
+                                   np.int64)
+        self.batch_players = [player for player, threshold in enumerate(is_threshold) if not threshold]
+        self.rng = rng
+        self.max_rounds = max_rounds
+        self.round = 0
+
+    def play(self, number_of_games):
+        """
+        Play the given number of games.
+        :return: tuple (rank, rounds)
+          rank: array (games x players) of player indices from the winner to the first
+                bankrupted player, rows of tied games are filled with -1
+          rounds: array of numbers of rounds played in every game
+        """
+        players = self.number_of_players
+        self.seating = np.argsort(self.rng.random((number_of_games, players)), axis=1)
+        self.money = np.full((number_of_games, players), STARTING_MONEY, np.int64)
+        self.position = np.zeros((number_of_games, players), np.int64)
+        self.suspended = np.zeros((number_of_games, players), bool)
+        self.alive = np.ones((number_of_games, players), bool)
+        self.skipped = np.zeros((number_of_games, players), bool)
+        self.owners = np.full((number_of_games, NUMBER_OF_FIELDS), -1, np.int64)
+        self.races = np.zeros((number_of_games, NUMBER_OF_FIELDS), np.int64)
+        self.horses_owned = np.zeros((number_of_games, players, len(STABLE_SIZE_TABLE)), np.int64)
+        self.trainers_owned = np.zeros((number_of_games, players), np.int64)
+        self.bank_money = np.full(number_of_games, BANK_MONEY - players * STARTING_MONEY, np.int64)
+        self.running = np.ones(number_of_games, bool)
+        self.winners = np.full(number_of_games, -1)
+        self.eliminated = np.zeros(number_of_games, np.int64)
+        self.elimination_order = np.full((number_of_games, players), -1)
+        self.rounds = np.full(number_of_games, self.max_rounds)
+
+        for self.round in range(1, self.max_rounds + 1):
+            for seat in range(players):
+                games = np.nonzero(self.running & self.alive[:, seat] & ~self.skipped[:, seat])[0]
+                self.skipped[:, seat] = False
+                self.play_turn(games, seat)
+                self.handle_bankruptcies(games[self.money[games, seat] < 0], seat, self.round)
+            if not self.running.any():
+                break
+
+        return self.compute_rank(), self.rounds
+
+    def throw_die(self, size):
+        return self.rng.integers(1, 7, size)
+
+    def play_turn(self, games, seat):
+        suspended = self.suspended[games, seat]
+        if suspended.any():
+            suspended_games = games[suspended]
+            released_games = suspended_games[self.throw_die(suspended_games.size) == 6]
+            self.suspended[released_games, seat] = False
+            games = np.concatenate((games[~suspended], released_games))
+
+        die = self.throw_die(games.size)
+        six = die == 6
+        die[six] += self.throw_die(np.count_nonzero(six))
+        twelve = die == 12
+
+        # 12 means going to the suspension field without a bonus
+        suspended_games = games[twelve]
+        self.position[suspended_games, seat] = SUSPENSION_INDEX
+        self.suspended[suspended_games, seat] = True
+
+        games = games[~twelve]
+        position = self.position[games, seat] + die[~twelve]
+        crossed_start = position >= NUMBER_OF_FIELDS
+        position[crossed_start] -= NUMBER_OF_FIELDS
+        self.position[games, seat] = position
+        bonus_games = games[crossed_start]
+        bonus_games = bonus_games[self.bank_money[bonus_games] > START_BONUS]
+        self.bank_money[bonus_games] -= START_BONUS
+        self.money[bonus_games, seat] += START_BONUS
+
+        self.visit(games, position, seat)
+
+    def visit(self, games, fields, seat):
+        kinds = FIELD_KINDS[fields]
+
+        suspension = kinds == SUSPENSION
+        self.suspended[games[suspension], seat] = True
+
+        checkup = kinds == VETERINARY_CHECKUP
+        self.pay_to_bank(games[checkup], seat, FEES[fields[checkup]])
+
+        is_property = (kinds == HORSE) | (kinds == TRAINER)
+        games, fields, kinds = games[is_property], fields[is_property], kinds[is_property]
+        owners = self.owners[games, fields]
+
+        unowned = owners < 0
+        self.offer_properties(games[unowned], fields[unowned], seat)
+
+        owned_by_another = (owners >= 0) & (owners != seat)
+        self.pay_admissions(games[owned_by_another], fields[owned_by_another],
+                            kinds[owned_by_another], owners[owned_by_another], seat)
+
+        owned_horse = (owners == seat) & (kinds == HORSE)
+        self.offer_races(games[owned_horse], fields[owned_horse], seat)
+
+    def pay_to_bank(self, games, seat, amounts):
+        self.money[games, seat] -= amounts
+        self.bank_money[games] += amounts
+
+    def wants_to_buy(self, games, seat, kind, fields, prices):
+        """
+        Ask the players at the seat in the given games whether they want to buy the offers.
+        :return: bool array of the decisions
+        """
+        players = self.seating[games, seat]
+        money = self.money[games, seat]
+        # threshold strategies are decided all at once (the others have no threshold)
+        decisions = (money - prices) > self.thresholds[players]
+        for player in self.batch_players:
+            asked = players == player
+            if asked.any():
+                asked_games, asked_fields = games[asked], fields[asked]
+                decisions[asked] = self.strategies[player].decide_batch(DecisionRequests(
+                    kind, asked_fields, prices[asked], money[asked], self.round,
+                    self.horses_owned[asked_games, seat, STABLES[asked_fields]],
+                    self.trainers_owned[asked_games, seat]
+                ))
+        return decisions
+
+    def offer_properties(self, games, fields, seat):
+        affordable = self.money[games, seat] >= PRICES[fields]
+        games, fields = games[affordable], fields[affordable]
+        prices = PRICES[fields]
+        buys = self.wants_to_buy(games, seat, PROPERTY, fields, prices)
+        games, fields, prices = games[buys], fields[buys], prices[buys]
+        self.pay_to_bank(games, seat, prices)
+        self.owners[games, fields] = seat
+        horses = FIELD_KINDS[fields] == HORSE
+        self.horses_owned[games[horses], seat, STABLES[fields[horses]]] += 1
+        self.trainers_owned[games[~horses], seat] += 1
+
+    def pay_admissions(self, games, fields, kinds, owners, seat):
+        races = np.where(self.suspended[games, owners], 0, self.races[games, fields])
+        admissions = np.where(
+            kinds == HORSE,
+            ADMISSIONS[fields, races],
+            TRAINER_ADMISSIONS[self.trainers_owned[games, owners]]
+        )
+        self.money[games, seat] -= admissions
+        self.money[games, owners] += admissions
+
+    def offer_races(self, games, fields, seat):
+        stables = STABLES[fields]
+        offered = (self.races[games, fields] < 5) \
+            & (self.horses_owned[games, seat, stables] == STABLE_SIZE_TABLE[stables]) \
+            & (self.money[games, seat] >= PRICES[fields])
+        games, fields = games[offered], fields[offered]
+        prices = NEW_RACE_PRICES[fields]
+        buys = self.wants_to_buy(games, seat, RACE, fields, prices)
+        games, fields, prices = games[buys], fields[buys], prices[buys]
+        self.pay_to_bank(games, seat, prices)
+        self.races[games, fields] += 1
+
+    def handle_bankruptcies(self, games, seat, round):
+        if games.size == 0:
+            return
+        self.alive[games, seat] = False
+        self.bank_money[games] += self.money[games, seat]
+        freed = self.owners[games] == seat
+        self.owners[games] = np.where(freed, -1, self.owners[games])
+        self.races[games] = np.where(freed, 0, self.races[games])
+        self.horses_owned[games, seat] = 0
+        self.trainers_owned[games, seat] = 0
+        self.elimination_order[games, self.eliminated[games]] = seat
+        self.eliminated[games] += 1
+
+        # the next player in the round loses his turn
+        if seat + 1 < self.number_of_players:
+            later_seats = self.alive[games, seat + 1:]
+            has_later_seat = later_seats.any(axis=1)
+            next_seats = later_seats.argmax(axis=1) + seat + 1
+            self.skipped[games[has_later_seat], next_seats[has_later_seat]] = True
+
+        finished = self.alive[games].sum(axis=1) == 1
+        finished_games = games[finished]
+        self.winners[finished_games] = self.alive[finished_games].argmax(axis=1)
+        self.running[finished_games] = False
+        self.rounds[finished_games] = round
+
+    def compute_rank(self):
+        number_of_games = len(self.winners)
+        seats = np.empty((number_of_games, self.number_of_players), np.int64)
+        seats[:, 0] = self.winners
+        seats[:, 1:] = self.elimination_order[:, -2::-1]
+        rank = np.take_along_axis(self.seating, np.maximum(seats, 0), axis=1)
+        rank[self.winners < 0] = -1
+        return rank
+
+
+def chi_squared_survival(statistic, degrees_of_freedom):
+    """
+    Probability that a chi-squared variable is at least the given statistic
+    (the p-value of a chi-squared test).
+    """
+    a = degrees_of_freedom / 2
+    x = statistic / 2
+    if x <= 0:
+        return 1.0
+    # series of the regularized lower incomplete gamma function
+    term = total = 1 / a
+    n = 1
+    while term > total * 1e-12:
+        term *= x / (a + n)
+        total += term
+        n += 1
+    return max(0.0, 1 - total * math.exp(-x + a * math.log(x) - math.lgamma(a)))
+
+
+def compare_with_reference(strategies, number_of_games, seed):
+    """
+    Play the same number of games of the strategies with Game and BatchSimulator
+    and test whether their outcomes (which player wins or a tie)
+    come from the same distribution (chi-squared test of homogeneity).
+    :return: tuple (reference outcome counts, batch outcome counts,
+                    reference mean rounds, batch mean rounds, p-value)
+    """
+    number_of_players = len(strategies)
+    reference_outcomes = np.zeros(number_of_players + 1, np.int64)  # the last one is a tie
+    reference_rounds = 0
+    for game_index in range(number_of_games):
+        players = [Player(str(index), strategy) for index, strategy in enumerate(strategies)]
+        game = Game(players, seed + game_index)
+        rank = game.play()
+        reference_outcomes[int(rank[0]) if rank else number_of_players] += 1
+        reference_rounds += game.round
+
+    simulator = BatchSimulator(strategies, np.random.default_rng(seed))
+    rank, rounds = simulator.play(number_of_games)
+    batch_outcomes = np.bincount(np.where(rank[:, 0] < 0, number_of_players, rank[:, 0]),
+                                 minlength=number_of_players + 1)
+
+    table = np.array([reference_outcomes, batch_outcomes], float)
+    table = table[:, table.sum(axis=0) > 0]
+    expected = table.sum(axis=1, keepdims=True) * table.sum(axis=0) / table.sum()
+    statistic = ((table - expected) ** 2 / expected).sum()
+    p_value = chi_squared_survival(statistic, table.shape[1] - 1)
+
+    return reference_outcomes, batch_outcomes, \
+        reference_rounds / number_of_games, rounds.mean(), p_value
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Compare outcomes of the batch simulator with the reference game engine."
+    )
+    parser.add_argument("thresholds", type=int, nargs="*", default=[0, 3000, 20000],
+                        help="thresholds of the players")
+    parser.add_argument("--score", action="store_true", help="add a player of ScoreStrategy")
+    parser.add_argument("--no-cheap-horses", action="store_true",
+                        help="add a player of NoCheapHorsesStrategy")
+    parser.add_argument("--games", type=int, default=2000, help="number of games of each engine")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--significance", type=float, default=.001,
+                        help="significance level of the test")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    logger.set_sink(logger.NullSink())
+    strategies = [[ThresholdStrategy(threshold), f"Threshold{threshold}"]
+                  for threshold in arguments.thresholds]
+    if arguments.score:
+        strategies.append([ScoreStrategy(), "ScoreStrategy"])
+    if arguments.no_cheap_horses:
+        strategies.append([NoCheapHorsesStrategy(), "NoCheapHorses"])
+    reference, batch, reference_rounds, batch_rounds, p_value = compare_with_reference(
+        [strategy[0] for strategy in strategies], arguments.games, arguments.seed
+    )
+    names = [strategy[1] for strategy in strategies] + ["tie"]
+    print(f"{'outcome':>16} {'reference':>10} {'batch':>10}")
+    for name, reference_count, batch_count in zip(names, reference, batch):
+        print(f"{name:>16} {reference_count:>10} {batch_count:>10}")
+    print(f"{'mean rounds':>16} {reference_rounds:>10.1f} {batch_rounds:>10.1f}")
+    print(f"p-value: {p_value:.4f}")
+    if p_value < arguments.significance:
+        print("The engines differ!")
+        exit(1)
+    print("The engines are statistically equivalent.")
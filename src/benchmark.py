@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+from board import initialBoard, BoardState, Horse, Trainer, VeterinaryCheckup
+from game import Game
+from player import Player
+from tournament import Tournament, STRATEGIES
+import argparse
+import json
+import logger
+import platform
+import statistics
+import time
+import tracemalloc
+
+STRATEGIES_BY_NAME = {strategy[1]: strategy for strategy in STRATEGIES}
+
+# mixes of strategies whose games are measured
+MIXES = {
+    "threshold": ["Threshold0", "Threshold3000", "Threshold20000"],
+    "no_cheap_horses": ["NoCheapHorses", "Threshold0", "Threshold3000"],
+    "score": ["ScoreStrategy", "Threshold0", "Threshold3000"],
+    "mixed": ["ScoreStrategy", "NoCheapHorses", "Threshold3000"],
+}
+
+
+class Benchmark:
+    """
+    A benchmark of the game engine.
+    Every measurement is stored as a metric with a unit and a direction
+    (whether a higher value is better), so two runs can be compared.
+    Timings are the best of several repetitions, which is the least noisy.
+    """
+
+    def __init__(self, games=200, seed=0, repeats=3):
+        """
+        :param games: number of games played for each measurement of whole games
+        :param seed: seed of the games, all runs play the same games
+        :param repeats: number of repetitions of every timing
+        """
+        self.games = games
+        self.seed = seed
+        self.repeats = repeats
+        self.metrics = {}
+
+    def add_metric(self, name, value, unit, higher_is_better):
+        self.metrics[name] = {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+        print(f"{name:<52} {value:>14.6g} {unit}")
+
+    @staticmethod
+    def create_players(mix):
+        return [Player(name, STRATEGIES_BY_NAME[name][0]) for name in MIXES[mix]]
+
+    def run(self):
+        logger.set_sink(logger.NullSink())
+        self.play_games("mixed", self.games)  # warm up
+        for mix in MIXES:
+            self.measure_games(mix)
+        self.measure_turn_latency()
+        self.measure_setup()
+        self.measure_controller_queries()
+        self.measure_field_visits()
+        self.measure_tournament()
+        self.measure_peak_memory()
+
+    def play_games(self, mix, number_of_games):
+        for game_index in range(number_of_games):
+            Game(self.create_players(mix), self.seed + game_index).play()
+
+    def measure_games(self, mix):
+        elapsed = self.best_time(lambda: self.play_games(mix, self.games))
+        self.add_metric(f"games_per_second.{mix}", self.games / elapsed, "games/s", True)
+
+    def best_time(self, function):
+        """
+        :return: the shortest time of the function call in seconds
+        """
+        times = []
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    def measure_turn_latency(self, number_of_turns=100000):
+        latencies = []
+        game = None
+        for turn in range(number_of_turns):
+            if game is None or any(player.money < 0 for player in game.players):
+                game = Game(self.create_players("mixed"), self.seed + turn)
+                first_turn = turn
+            turns_in_game = turn - first_turn
+            player = game.players[turns_in_game % len(game.players)]
+            game.round = turns_in_game // len(game.players) + 1
+            game.current_player = player
+            start = time.perf_counter_ns()
+            game.play_turn(player)
+            latencies.append(time.perf_counter_ns() - start)
+        latencies.sort()
+        self.add_metric("turn_latency.mean", statistics.fmean(latencies), "ns", False)
+        self.add_metric("turn_latency.median", latencies[len(latencies) // 2], "ns", False)
+        self.add_metric("turn_latency.p99", latencies[len(latencies) * 99 // 100], "ns", False)
+
+    def measure_setup(self, repetitions=20000):
+        self.add_metric("setup.game", self.time_per_call(
+            lambda: Game(self.create_players("threshold"), self.seed), repetitions
+        ), "us", False)
+        self.add_metric("setup.board_state", self.time_per_call(
+            lambda: BoardState(initialBoard, len(MIXES["threshold"])), repetitions
+        ), "us", False)
+
+    def time_per_call(self, function, repetitions):
+        """
+        :return: time of one call of the function in microseconds
+        """
+        def call_repeatedly():
+            for _ in range(repetitions):
+                function()
+        return self.best_time(call_repeatedly) / repetitions * 1e6
+
+    def create_mid_game(self):
+        """
+        :return: a game in which the first player owns every other property
+                 and the second one is on turn
+        """
+        game = Game(self.create_players("mixed"), self.seed)
+        owner, visitor = game.players[0], game.players[1]
+        for field in initialBoard[::2]:
+            if isinstance(field, (Horse, Trainer)):
+                game.board_state.set_owner(field, owner.id)
+        visitor.money = 10 ** 12  # never goes bankrupt
+        game.current_player = visitor
+        return game, owner, visitor
+
+    def measure_controller_queries(self, repetitions=100000):
+        game, owner, visitor = self.create_mid_game()
+        controller = game.controller
+        horse = next(field for field in initialBoard if isinstance(field, Horse))
+        queries = {
+            "player_money": lambda: controller.player_money,
+            "property_owner": lambda: controller.property_owner(horse),
+            "is_property_owned_by_another_player":
+                lambda: controller.is_property_owned_by_another_player(horse),
+            "is_whole_stable_owned_by_player":
+                lambda: controller.is_whole_stable_owned_by_player(horse.stable, owner.id),
+            "count_number_of_trainers_owned_by_player":
+                lambda: controller.count_number_of_trainers_owned_by_player(owner.id),
+            "is_player_suspended": lambda: controller.is_player_suspended(owner.id),
+        }
+        for name, query in queries.items():
+            self.add_metric(f"controller.{name}", self.time_per_call(query, repetitions) * 1000,
+                            "ns", False)
+
+    def measure_field_visits(self, repetitions=20000):
+        game, owner, visitor = self.create_mid_game()
+        fields = {
+            "horse": next(field for field in initialBoard if isinstance(field, Horse)),
+            "trainer": next(field for field in initialBoard if isinstance(field, Trainer)),
+            "veterinary_checkup":
+                next(field for field in initialBoard if isinstance(field, VeterinaryCheckup)),
+        }
+        for name, field in fields.items():
+            self.add_metric(f"visit.{name}", self.time_per_call(
+                lambda: field.visit(game.controller), repetitions
+            ) * 1000, "ns", False)
+        self.add_metric("move_player", self.time_per_call(
+            lambda: game.move_player(visitor, 7), repetitions
+        ) * 1000, "ns", False)
+
+    def create_tournament(self, set_length):
+        return Tournament(3, set_length, STRATEGIES, seed=self.seed,
+                          results_file=None, checkpoint_file=None, dataset_directory=None,
+                          matrices_file=None)
+
+    def measure_tournament(self):
+        set_length = max(1, self.games // 100)
+        elapsed = self.best_time(lambda: self.create_tournament(set_length).play())
+        total_number_of_games = self.create_tournament(set_length).total_number_of_games
+        self.add_metric("tournament.games_per_second",
+                        total_number_of_games / elapsed, "games/s", True)
+
+    def measure_peak_memory(self):
+        tracemalloc.start()
+        self.create_tournament(1).play()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.add_metric("tournament.peak_memory", peak / 2 ** 20, "MiB", False)
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "games": self.games,
+                "seed": self.seed,
+                "metrics": self.metrics,
+            }, file, indent=2)
+
+
+def compare(baseline_path, current_metrics, tolerance):
+    """
+    Compare the metrics with a baseline and print the changes.
+    :param tolerance: relative change considered a regression (e.g. 0.1 for 10 %)
+    :return: list of names of regressed metrics
+    """
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = json.load(file)["metrics"]
+
+    print(f"\n{'metric':<52} {'baseline':>14} {'current':>14} {'change':>8}")
+    regressions = []
+    for name, metric in current_metrics.items():
+        if name not in baseline or not baseline[name]["value"]:
+            continue
+        change = metric["value"] / baseline[name]["value"] - 1
+        worse = -change if metric["higher_is_better"] else change
+        flag = ""
+        if worse > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<52} {baseline[name]['value']:>14.6g} {metric['value']:>14.6g} "
+              f"{100 * change:>+7.1f}%{flag}")
+    return regressions
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the game engine.")
+    parser.add_argument("--games", type=int, default=200,
+                        help="number of games of every measurement of whole games")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3, help="repetitions of every timing")
+    parser.add_argument("--output", default=None, help="save the metrics to this JSON file")
+    parser.add_argument("--compare", default=None, help="compare with metrics saved earlier")
+    parser.add_argument("--tolerance", type=float, default=.1,
+                        help="relative slowdown reported as a regression")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    benchmark = Benchmark(arguments.games, arguments.seed, arguments.repeats)
+    benchmark.run()
+    if arguments.output is not None:
+        benchmark.save(arguments.output)
+    if arguments.compare is not None:
+        if compare(arguments.compare, benchmark.metrics, arguments.tolerance):
+            exit(1)
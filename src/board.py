@@ -1,11 +1,16 @@
 from abc import ABC, abstractmethod
+from collections import Counter
 
 
 class Field(ABC):
     """
     An abstract field on the board.
+    Fields hold only the static data of the board and are shared by all games.
+    The mutable state of a game (owners and races) is held in BoardState.
     """
 
+    __slots__ = ("index",)  # position on the board, assigned when the board is created
+
     @property
     @abstractmethod
     def name(self):
@@ -30,9 +35,10 @@ class Property(Field):
     A field that can be bought and owned.
     """
 
+    __slots__ = ("_name", "price")
+
     def __init__(self, name, price):
         self._name = name
-        self.owner_name = None
         self.price = price
 
     @property
@@ -40,7 +46,16 @@ class Property(Field):
         return self._name
 
     def visit(self, controller) -> bool:
-        if self.owner_name is None and controller.has_player_enough_money(self.price):
+        if controller.property_owner(self) is None:
+            return self.offer(controller)
+        return False
+
+    def offer(self, controller) -> bool:
+        """
+        Offer this free property to the current player.
+        :return: whether the player could afford it
+        """
+        if controller.has_player_enough_money(self.price):
             wanna_buy = controller.ask_player_whether_he_wants_property(self)
             if wanna_buy:
                 controller.buy_property_for_player(self)
@@ -57,39 +72,42 @@ class Horse(Property):
     If the horse has an owner and someone else visits it, he must pay an admission.
     """
 
-    def __init__(self, name: str, price: int, stable: int, admissions: [int],
+    __slots__ = ("stable", "admissions", "new_race_price", "admission_purpose")
+
+    def __init__(self, name: str, price: int, stable: int, admissions: (int, ...),
                  new_race_price: int):
         super().__init__(name, price)
         self.stable = stable
-        self.admissions = admissions
-        self.races = 0
+        self.admissions = tuple(admissions)
         self.new_race_price = new_race_price
+        self.admission_purpose = f"visiting {name}"  # not formatted on every visit
 
     def visit(self, controller) -> bool:
-        if super().visit(controller):
+        owner = controller.property_owner(self)
+        if owner is None:
+            return self.offer(controller)
+        races = controller.number_of_races(self)
+        if owner != controller.player_id:  # owned by another player
+            if not controller.is_player_suspended(owner):
+                admission = self.admissions[races]
+            else:
+                admission = self.admissions[0]
+            controller.pay_admission_to_another_player(
+                owner, admission, self.admission_purpose
+            )
             return True
-        if self.owner_name is not None:
-            if controller.is_property_owned_by_another_player(self):
-                if not controller.is_player_suspended(self.owner_name):
-                    admission = self.admissions[self.races]
-                else:
-                    admission = self.admissions[0]
-                controller.pay_admission_to_another_player(
-                    self.owner_name, admission, f"visiting {self}"
+        elif races < 5:  # owned by the player
+            owns_the_whole_stable = \
+                controller.is_whole_stable_owned_by_player(
+                    self.stable, owner
                 )
+            has_enough_money = controller.has_player_enough_money(self.price)
+            if owns_the_whole_stable and has_enough_money:
+                wanna_buy_new_race = \
+                    controller.ask_player_whether_he_wants_new_race(self)
+                if wanna_buy_new_race:
+                    controller.buy_new_race_for_player(self)
                 return True
-            elif self.races < 5:  # owned by the player
-                owns_the_whole_stable = \
-                    controller.is_whole_stable_owned_by_player(
-                        self.stable, self.owner_name
-                    )
-                has_enough_money = controller.has_player_enough_money(self.price)
-                if owns_the_whole_stable and has_enough_money:
-                    wanna_buy_new_race = \
-                        controller.ask_player_whether_he_wants_new_race(self)
-                    if wanna_buy_new_race:
-                        controller.buy_new_race_for_player(self)
-                    return True
         return False
 
 
@@ -101,25 +119,28 @@ class Trainer(Property):
     """
 
     PRICE = 4000
-    ADMISSIONS = [
+    ADMISSIONS = (
         1000,
         2000,
         3000,
         4000
-    ]
+    )
+
+    __slots__ = ()
 
     def __init__(self, trainer_number: int):
         super().__init__(f"Trainer {trainer_number}", 4000)
 
     def visit(self, controller) -> bool:
-        if super().visit(controller):
-            return True
-        if controller.is_property_owned_by_another_player(self):
+        owner = controller.property_owner(self)
+        if owner is None:
+            return self.offer(controller)
+        if owner != controller.player_id:  # owned by another player
             number_of_trainers_owned = \
-                controller.count_number_of_trainers_owned_by_player(self.owner_name)
+                controller.count_number_of_trainers_owned_by_player(owner)
             admission = self.ADMISSIONS[number_of_trainers_owned - 1]
             controller.pay_admission_to_another_player(
-                self.owner_name, admission, "a training"
+                owner, admission, "a training"
             )
             return True
         return False
@@ -131,6 +152,8 @@ class StartField(Field):
     Crossing the start field earns you 4000 Kč.
     """
 
+    __slots__ = ()
+
     @property
     def name(self):
         return "Start"
@@ -144,6 +167,8 @@ class ParkingLot(Field):
     Parking lot field that does nothing.
     """
 
+    __slots__ = ()
+
     @property
     def name(self):
         return "Parking Lot"
@@ -158,6 +183,8 @@ class VeterinaryCheckup(Field):
     Every player that visits this field has to pay an admission.
     """
 
+    __slots__ = ("fee",)
+
     def __init__(self, fee):
         self.fee = fee
 
@@ -177,6 +204,8 @@ class SuspensionField(Field):
     and doesn't leave the field until he throws 6.
     """
 
+    __slots__ = ()
+
     @property
     def name(self):
         return "Suspension"
@@ -186,7 +215,42 @@ class SuspensionField(Field):
         return True
 
 
-initialBoard = [
+class BoardState:
+    """
+    The mutable state of the board in one game.
+    Owners (player ids, None for free properties) and numbers of races are stored
+    in plain lists indexed by the field index, so a new game needs no copy of the fields.
+    Numbers of horses owned in every stable and numbers of trainers owned
+    are kept up to date on every change of ownership, so they can be
+    looked up without scanning the board.
+    """
+
+    def __init__(self, board, number_of_players):
+        self.board = board
+        self.owners = [None] * len(board)
+        self.races = [0] * len(board)
+        # horses_owned[player id][stable] -> number of horses
+        self.horses_owned = [[0] * NUMBER_OF_STABLES for _ in range(number_of_players)]
+        self.trainers_owned = [0] * number_of_players  # player id -> number of trainers
+
+    def set_owner(self, property: Property, owner: int):
+        self.owners[property.index] = owner
+        if isinstance(property, Horse):
+            self.horses_owned[owner][property.stable] += 1
+        elif isinstance(property, Trainer):
+            self.trainers_owned[owner] += 1
+
+    def free_properties_of(self, owner: int):
+        owners = self.owners
+        for index in range(len(owners)):
+            if owners[index] == owner:
+                owners[index] = None
+                self.races[index] = 0
+        self.horses_owned[owner] = [0] * NUMBER_OF_STABLES
+        self.trainers_owned[owner] = 0
+
+
+initialBoard = (
     StartField(),
     Horse("Fantome", 1200, 0, [40, 200, 600, 1800, 3200, 5000], 1000),
     # Finances
@@ -227,4 +291,13 @@ initialBoard = [
     Horse("Narcius", 7000, 7, [700, 3500, 10000, 22000, 26000, 30000], 4000),
     VeterinaryCheckup(1000),
     Horse("Napoli", 8000, 7, [1000, 4000, 12000, 28000, 34000, 40000], 4000),
-]
+)
+
+for field_index, field in enumerate(initialBoard):
+    field.index = field_index
+
+STABLE_SIZES = Counter(field.stable for field in initialBoard if isinstance(field, Horse))
+NUMBER_OF_STABLES = max(STABLE_SIZES) + 1
+SUSPENSION_INDEX = next(
+    field.index for field in initialBoard if isinstance(field, SuspensionField)
+)
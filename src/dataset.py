@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+
+import numpy as np
+
+PART_SIZE = 100000  # games in one file
+MAX_ROUNDS_STORED = np.iinfo(np.int16).max  # the most rounds the rounds column can hold
+
+
+def game_dtype(number_of_players):
+    """
+    :return: NumPy structured type of the outcome of one game, columns hold
+             one value per player in the order of the combination
+    """
+    return np.dtype([
+        ("combination", np.int32),
+        ("game", np.int32),
+        ("rounds", np.int16),
+        ("strategies", np.int16, (number_of_players,)),  # indices of the strategies
+        ("seats", np.int8, (number_of_players,)),  # order of turns, from 0
+        # 1 for the winner, in a tie the players who didn't go bankrupt share the first place
+        ("places", np.int8, (number_of_players,)),
+        ("money", np.int64, (number_of_players,)),  # at the end or at the bankruptcy
+    ])
+
+
+class DatasetWriter:
+    """
+    A writer storing outcomes of games in a directory of NumPy files.
+    Games are buffered and written in parts of PART_SIZE games,
+    so the memory used doesn't grow with the number of games.
+    Any structured arrays can be stored (e.g. snapshots of tied games).
+    A resumed tournament appends to the parts written before its checkpoint
+    and removes the later ones, whose games are played again.
+    """
+
+    def __init__(self, directory, strategies, number_of_players, append=False, parts=None):
+        """
+        :param strategies: names of the strategies, games refer to them by index
+        :param parts: number of the parts kept when appending (None for all of them)
+        """
+        self.directory = directory
+        self.buffer = []
+        self.buffered_games = 0
+        os.makedirs(directory, exist_ok=True)
+        if append and parts is not None:
+            for part in list_parts(directory)[parts:]:
+                os.remove(part)
+        self.number_of_parts = len(list_parts(directory))
+        if not append:
+            for part in list_parts(directory):
+                os.remove(part)
+            self.number_of_parts = 0
+            with open(os.path.join(directory, "dataset.json"), "w", encoding="utf-8") as file:
+                json.dump({"strategies": strategies, "number_of_players": number_of_players},
+                          file, ensure_ascii=False)
+
+    def write(self, games):
+        """
+        :param games: structured array of game_dtype (or another one), None for no games
+        """
+        if games is None:
+            return
+        self.buffer.append(games)
+        self.buffered_games += len(games)
+        if self.buffered_games >= PART_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.buffered_games:
+            return
+        path = os.path.join(self.directory, f"part-{self.number_of_parts:05}.npz")
+        np.savez_compressed(path, games=np.concatenate(self.buffer))
+        self.number_of_parts += 1
+        self.buffer = []
+        self.buffered_games = 0
+
+    def close(self):
+        self.flush()
+
+
+def list_parts(directory):
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.startswith("part-") and name.endswith(".npz")
+    )
+
+
+class Dataset:
+    """
+    Outcomes of the games of a tournament written by DatasetWriter.
+    Parts are loaded one by one, so even huge datasets can be processed.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "dataset.json"), encoding="utf-8") as file:
+            info = json.load(file)
+        self.strategies = info["strategies"]
+        self.number_of_players = info["number_of_players"]
+
+    def parts(self):
+        """
+        :return: generator of structured arrays of game_dtype
+        """
+        for path in list_parts(self.directory):
+            with np.load(path) as part:
+                yield part["games"]
+
+    def load(self):
+        """
+        :return: all the games in one structured array (for small datasets)
+        """
+        return np.concatenate(list(self.parts()) or [np.empty(0, game_dtype(self.number_of_players))])
+
+    def statistics(self) -> 'Statistics':
+        statistics = Statistics(self.strategies, self.number_of_players)
+        for games in self.parts():
+            statistics.add(games)
+        return statistics
+
+
+class Statistics:
+    """
+    Statistics of the games aggregated by strategies.
+    """
+
+    def __init__(self, strategies, number_of_players):
+        self.strategies = strategies
+        number_of_strategies = len(strategies)
+        self.number_of_games = 0
+        self.number_of_ties = 0
+        self.games = np.zeros(number_of_strategies, np.int64)
+        # places[strategy, place], place 0 counts ties
+        self.places = np.zeros((number_of_strategies, number_of_players + 1), np.int64)
+        self.money = np.zeros(number_of_strategies)  # sum of final money
+        self.rounds = np.zeros(1, np.int64)  # number of games by the number of rounds
+
+    def add(self, games):
+        strategies = games["strategies"].ravel()
+        self.number_of_games += len(games)
+        places = games["places"]
+        ties = (places == 1).sum(axis=1) > 1
+        self.number_of_ties += int(np.count_nonzero(ties))
+        self.games += np.bincount(strategies, minlength=len(self.games))
+        places = np.where(ties[:, None], 0, places)
+        np.add.at(self.places, (strategies, places.ravel()), 1)
+        self.money += np.bincount(strategies, games["money"].ravel(), minlength=len(self.money))
+        rounds = np.bincount(games["rounds"])
+        if len(rounds) > len(self.rounds):
+            rounds[:len(self.rounds)] += self.rounds
+            self.rounds = rounds
+        else:
+            self.rounds[:len(rounds)] += rounds
+
+    @property
+    def wins(self):
+        return self.places[:, 1]
+
+    @property
+    def non_tie_games(self):
+        return self.games - self.places[:, 0]
+
+    @property
+    def mean_rounds(self):
+        return (self.rounds * np.arange(len(self.rounds))).sum() / max(self.number_of_games, 1)
+
+    @property
+    def ranks(self):
+        """
+        :return: list of tuples (name, wins, non-tie games, games) sorted by wins,
+                 the same as Results.ranks
+        """
+        return sorted(
+            ((name, int(wins), int(non_tie_games), int(games))
+             for name, wins, non_tie_games, games
+             in zip(self.strategies, self.wins, self.non_tie_games, self.games)),
+            key=lambda rank: rank[1], reverse=True
+        )
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Print statistics of the games of a tournament.")
+    parser.add_argument("directory", nargs="?", default="../games",
+                        help="dataset written by a tournament")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    statistics = Dataset(arguments.directory).statistics()
+    print(f"{statistics.number_of_games} games, {statistics.number_of_ties} ties, "
+          f"{statistics.mean_rounds:.1f} rounds on average.")
+    places = " ".join(f"{place:>7}." for place in range(1, statistics.places.shape[1]))
+    print(f"{'strategy':<20} {places} {'ties':>8} {'money':>10}")
+    for index in np.argsort(-statistics.wins, kind="stable"):
+        counts = " ".join(f"{count:>8}" for count in statistics.places[index, 1:])
+        mean_money = statistics.money[index] / max(statistics.games[index], 1)
+        print(f"{statistics.strategies[index]:<20} {counts} "
+              f"{statistics.places[index, 0]:>8} {mean_money:>10.0f}")
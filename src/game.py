@@ -1,13 +1,12 @@
 from board import initialBoard
-from random import randint, shuffle
-from logger import log, log_event
-from copy import deepcopy
-from board import Horse, Trainer, Property, SuspensionField
+from random import Random
+from typing import Optional
+from logger import log, log_event, is_enabled, EVENT, STATE, RESULT
+from board import BoardState, Horse, Property, STABLE_SIZES, SUSPENSION_INDEX
 from player import Player
 
-
-def throw_die():
-    return randint(1, 6)
+MAX_ROUNDS = 499  # by default, a game without a winner after this round is a tie
+START_BONUS = 4000
 
 
 class Game:
@@ -15,103 +14,187 @@ class Game:
     Class representing the whole game.
     It holds the players, board and bank.
     It controls the game and all the main logic is implemented here.
+    All the randomness (seating order and dice) comes from the game's own
+    random generator, so a game with the same seed can be replayed.
     """
 
-    def __init__(self, players):
-        self.players = players
-        self.board = deepcopy(initialBoard)
+    def __init__(self, players, rng=None, profiler=None, recorder=None, resolution=None,
+                 max_rounds=MAX_ROUNDS, snapshots=None):
+        """
+        :param players: players of the game (they will be shuffled)
+        :param rng: random.Random instance or a seed (None for a random seed)
+        :param profiler: Profiler recording the time spent in the phases of the game
+        :param recorder: TraceRecorder recording the events of the game
+        :param resolution: EarlyResolution ending the game when its outcome is certain
+        :param max_rounds: number of rounds after which the game is a tie
+        :param snapshots: Snapshots taking snapshots of the state every few rounds
+        """
+        self.players = players  # in the order of turns, including bankrupt players
+        self.alive = [True] * len(players)  # indexed by the player id
+        self.number_of_players_alive = len(players)
+        self.board = initialBoard
+        self.board_state = BoardState(self.board, len(players))
         self.round = 0
         self.rank = []
         self.bank_money = 200000 - (len(players) * 30000)
         self.current_player = None
         self.controller = self.Controller(self)
-
-        shuffle(self.players)
+        self.rng = rng if isinstance(rng, Random) else Random(rng)
+        self.logs_events = is_enabled(EVENT)  # lets the hot paths skip logging calls
+        self.reports_state = is_enabled(STATE)
+        self.resolution = resolution
+        self.max_rounds = max_rounds
+        self.snapshots = snapshots
+        self.resolved = False  # whether the game was ended by the early resolution
+
+        self.rng.shuffle(self.players)
+        for player_id, player in enumerate(self.players):
+            player.id = player_id
+
+        if profiler is not None:
+            profiler.attach(self)
+        if recorder is not None:
+            recorder.attach(self)
 
     def play(self):
-        for self.round in range(1, 500):
-            for player in self.players:
+        players = self.players
+        alive = self.alive
+        resolution = self.resolution
+        snapshots = self.snapshots
+        for self.round in range(1, self.max_rounds + 1):
+            loses_turn = False
+            for player in players:
+                if not alive[player.id]:
+                    continue
+                if loses_turn:
+                    # the player after a bankrupt player loses his turn in this round
+                    # (bankrupt players used to be removed while iterating over them)
+                    loses_turn = False
+                    continue
                 self.current_player = player
                 self.play_turn(player)
                 if player.money < 0:
                     log_event(player, "BANKRUPTED")
-                    self.players.remove(player)
+                    alive[player.id] = False
+                    self.number_of_players_alive -= 1
+                    loses_turn = True
                     self.bank_money += player.money
                     self.free_losers_properties(player)
                     self.rank.insert(0, player.name)
 
-                    if len(self.players) == 1:
+                    if self.number_of_players_alive == 1:
                         self.report_state()
-                        winner = self.players[0]
+                        winner = self.players_alive[0]
                         self.rank.insert(0, winner.name)
-                        log(f"{winner.name.upper()} WON, congrats!", "green")
-                        log("\nRank:", "cyan")
-                        for index, player_name in enumerate(self.rank):
-                            log(f"{index + 1}. {player_name}", "cyan")
+                        if is_enabled(RESULT):
+                            self.report_rank()
                         return self.rank
 
-            self.report_state()
+            if self.reports_state:
+                self.report_state()
+            if snapshots is not None and self.round % snapshots.interval == 0:
+                snapshots.take(self)
+
+            if resolution is not None and self.round >= resolution.next_round:
+                outcome = resolution.resolve(self)
+                if outcome is not None:
+                    self.resolved = True
+                    if not outcome:
+                        break
+                    self.rank = outcome
+                    if is_enabled(RESULT):
+                        self.report_rank()
+                    return self.rank
 
         return False  # the game failed and no one won -> tie
 
     def play_turn(self, player: Player):
         if not player.suspended:
-            die = throw_die()
+            die = self.throw_die()
             if die == 6:
-                die += throw_die()
+                die += self.throw_die()
             if die == 12:
-                log_event(player, f"threw {die} and that means he will be suspended")
+                if self.logs_events:
+                    log_event(player, "threw {} and that means he will be suspended", die)
                 return self.controller.move_player_to_suspension_field(False)
-            log_event(player, f"threw {die}")
+            if self.logs_events:
+                log_event(player, "threw {}", die)
             self.move_player(player, die)
         else:
-            log_event(player, "is suspended")
-            die = throw_die()
+            if self.logs_events:
+                log_event(player, "is suspended")
+            die = self.throw_die()
             if die == 6:
-                log(f"{player} threw {die} and is now free again!", player.color)
+                log(EVENT, "{} threw {} and is now free again!", player, die, color=player.color)
                 player.suspended = False
                 self.play_turn(player)
-            else:
-                log_event(player, f"threw {die} and is still suspended")
+            elif self.logs_events:
+                log_event(player, "threw {} and is still suspended", die)
+
+    @property
+    def players_alive(self):
+        return [player for player in self.players if self.alive[player.id]]
+
+    def throw_die(self):
+        # the same numbers as self.rng.randint(1, 6) (which draws 3 bits until they
+        # are below 6), without the overhead of its generic implementation
+        getrandbits = self.rng.getrandbits
+        die = getrandbits(3)
+        while die >= 6:
+            die = getrandbits(3)
+        return die + 1
 
     def move_player(self, player: Player, number_of_steps: int, receives_bonus: bool = True):
-        player.position += number_of_steps
-        if player.position > (len(self.board) - 1):
-            player.position -= len(self.board)
-            if self.bank_money > 4000 and receives_bonus:
-                self.bank_money -= 4000
-                player.money += 4000  # bonus for crossing the start field
+        board = self.board
+        position = player.position + number_of_steps
+        if position >= len(board):
+            position -= len(board)
+            if self.bank_money > START_BONUS and receives_bonus:
+                self.bank_money -= START_BONUS
+                player.money += START_BONUS  # bonus for crossing the start field
                 log_event(player, "received a bonus of 4000 Kč for crossing the start field")
-        field = self.board[player.position]
-        log_event(player, f"moved to {field.name}")
+        player.position = position
+        field = board[position]
+        if self.logs_events:
+            log_event(player, "moved to {}", field)
+        self.visit_field(field)
+
+    def visit_field(self, field):
         field.visit(self.controller)
 
     def report_state(self):
+        if not is_enabled(STATE):
+            return
         state_report = f"State after round {self.round} -- "
-        state_report += ", ".join(map(lambda p: f"{p}: {'{:,}'.format(p.money)} Kč", self.players))
-        log(state_report + "\n", "white")
+        state_report += ", ".join(map(lambda p: f"{p}: {'{:,}'.format(p.money)} Kč", self.players_alive))
+        log(STATE, "{}\n", state_report, color="white")
+
+    def report_rank(self):
+        winner_name = self.rank[0]
+        log(RESULT, "{} WON, congrats!", winner_name.upper(), color="green")
+        log(RESULT, "\nRank:", color="cyan")
+        for index, player_name in enumerate(self.rank):
+            log(RESULT, "{}. {}", index + 1, player_name, color="cyan")
 
     def free_losers_properties(self, loser: Player):
-        for field in self.board:
-            if isinstance(field, Property) and field.owner_name == loser.name:
-                field.owner_name = None
-                if isinstance(field, Horse):
-                    field.races = 0
+        self.board_state.free_properties_of(loser.id)
 
     class Controller:
         """
         The game controller.
         This class was designed as a gate for the "outer world" for interacting
         with players and fields, preventing it from having a direct access to them.
+        Players are referred to by their ids (their index in the order of turns).
         """
 
         def __init__(self, game: 'Game'):
             self.__game: 'Game' = game
+            self.__board_state = game.board_state
+            self.__players = game.players
 
-        def __find_player_with_name(self, name: str) -> Player:
-            for player in self.__game.players:
-                if player.name == name:
-                    return player
+        @property
+        def player_id(self) -> int:
+            return self.__game.current_player.id
 
         @property
         def player_name(self) -> str:
@@ -142,49 +225,46 @@ class Game:
             player.money -= amount
             self.__game.bank_money += amount
 
+        def property_owner(self, property: Property) -> Optional[int]:
+            """
+            :return: id of the owner of the property or None if it's free
+            """
+            return self.__board_state.owners[property.index]
+
+        def property_owner_name(self, property: Property) -> Optional[str]:
+            owner = self.__board_state.owners[property.index]
+            return self.__players[owner].name if owner is not None else None
+
+        def number_of_races(self, horse: Horse) -> int:
+            return self.__board_state.races[horse.index]
+
         def is_property_owned_by_player(self, property: Property) -> bool:
-            return property.owner_name == self.__game.current_player.name
+            return self.__board_state.owners[property.index] == self.__game.current_player.id
 
-        def number_of_horses_of_stable_owned_by_player(self, stable, player_name: str) -> int:
-            return len([
-                field for field in self.__game.board
-                if isinstance(field, Horse) and field.stable == stable
-                and field.owner_name == player_name
-            ])
+        def number_of_horses_of_stable_owned_by_player(self, stable, player_id: int) -> int:
+            return self.__board_state.horses_owned[player_id][stable]
 
         def number_of_horses_of_stable(self, stable: int) -> int:
-            return len([
-                field for field in self.__game.board
-                if isinstance(field, Horse) and field.stable == stable
-            ])
-
-        def is_whole_stable_owned_by_player(self, stable: int, player_name: str) -> bool:
-            return self.number_of_horses_of_stable_owned_by_player(stable, player_name) \
-                   == self.number_of_horses_of_stable(stable)
-
-        def number_of_trainers_already_owned_by_player(self, player_name: str) -> int:
-            return len([
-                field.owner_name == player_name
-                for field in self.__game.board
-                if isinstance(field, Trainer) and field.owner_name == player_name
-            ])
+            return STABLE_SIZES[stable]
+
+        def is_whole_stable_owned_by_player(self, stable: int, player_id: int) -> bool:
+            return self.__board_state.horses_owned[player_id][stable] == STABLE_SIZES[stable]
+
+        def number_of_trainers_already_owned_by_player(self, player_id: int) -> int:
+            return self.__board_state.trainers_owned[player_id]
 
         def has_player_enough_money(self, amount: int) -> bool:
-            return self.player_money >= amount
+            return self.__game.current_player.money >= amount
 
         def is_property_owned_by_another_player(self, property: Property) -> bool:
-            return property.owner_name is not None \
-                   and not self.is_property_owned_by_player(property)
+            owner = self.__board_state.owners[property.index]
+            return owner is not None and owner != self.__game.current_player.id
 
-        def count_number_of_trainers_owned_by_player(self, player_name: str) -> int:
-            return sum(
-                isinstance(field, Trainer) and field.owner_name == player_name
-                for field in self.__game.board
-            )
+        def count_number_of_trainers_owned_by_player(self, player_id: int) -> int:
+            return self.__board_state.trainers_owned[player_id]
 
-        def is_player_suspended(self, player_name: str) -> bool:
-            player = self.__find_player_with_name(player_name)
-            return player.suspended
+        def is_player_suspended(self, player_id: int) -> bool:
+            return self.__players[player_id].suspended
 
         def move_player_to_field(self, field_index: int, receives_bonus: bool = True):
             player = self.__game.current_player
@@ -195,39 +275,36 @@ class Game:
             self.__game.move_player(player, steps, receives_bonus)
 
         def move_player_to_suspension_field(self, receives_bonus: bool = True):
-            suspension_index = [
-                i
-                for i, field
-                in enumerate(self.__game.board)
-                if isinstance(field, SuspensionField)
-            ][0]
-            self.move_player_to_field(suspension_index, receives_bonus)
+            self.move_player_to_field(SUSPENSION_INDEX, receives_bonus)
 
         def buy_property_for_player(self, property: Property):
             player = self.__game.current_player
             price = property.price
             self.transfer_player_money_to_bank(player, price)
-            property.owner_name = player.name
-            log_event(player, f"bought {property}")
+            self.__board_state.set_owner(property, player.id)
+            log_event(player, "bought {}", property)
 
         def buy_new_race_for_player(self, horse: Horse):
             player = self.__game.current_player
             price = horse.new_race_price
             self.transfer_player_money_to_bank(player, price)
-            horse.races += 1
-            log_event(player, f"bought a new race for {horse}")
+            self.__board_state.races[horse.index] += 1
+            log_event(player, "bought a new race for {}", horse)
 
-        def pay_admission_to_another_player(self, receiver_name: str, amount: int, purpose: str):
+        def pay_admission_to_another_player(self, receiver_id: int, amount: int, purpose: str):
             player = self.__game.current_player
-            receiver = self.__find_player_with_name(receiver_name)
+            receiver = self.__players[receiver_id]
             player.money -= amount
             receiver.money += amount
-            log_event(player, f"paid {receiver_name} an admission of {amount} Kč for {purpose}")
+            if self.__game.logs_events:
+                log_event(player, "paid {} an admission of {} Kč for {}",
+                          receiver, amount, purpose)
 
         def pay_fee_to_bank(self, amount: int, purpose: str):
             player = self.__game.current_player
             self.transfer_player_money_to_bank(player, amount)
-            log_event(player, f"paid {amount} Kč for {purpose}")
+            if self.__game.logs_events:
+                log_event(player, "paid {} Kč for {}", amount, purpose)
 
         def suspend_player(self):
             player = self.__game.current_player
@@ -1,12 +1,111 @@
+import json
+from contextvars import ContextVar
+
 from termcolor import colored
 
-enabled = True
+# levels of messages
+EVENT = 10  # everything a player does during his turn
+STATE = 20  # state of the game after every round
+RESULT = 30  # the winner and the rank of a game
+DISABLED = 100
+
+
+class NullSink:
+    """
+    A sink that discards everything.
+    With this sink installed, no message is ever formatted.
+    """
+
+    level = DISABLED
+
+    def write(self, level, text, color, player, event, args):
+        pass
+
+    def close(self):
+        pass
 
 
-def log(text, color=None):
-    if enabled:
+class ConsoleSink:
+    """
+    A sink printing colored messages to the standard output.
+    """
+
+    def __init__(self, level=EVENT):
+        self.level = level
+
+    def write(self, level, text, color, player, event, args):
         print(colored(text, color))
 
+    def close(self):
+        pass
+
+
+class FileSink:
+    """
+    A sink writing structured messages to a file, one JSON object per line.
+    Besides the formatted text, every line contains the current context
+    (e.g. which game of a tournament it comes from), the player
+    and the event with its arguments.
+    """
+
+    def __init__(self, path, level=EVENT):
+        self.level = level
+        self.file = open(path, "a", buffering=1)  # line buffered, lines don't interleave
+
+    def write(self, level, text, color, player, event, args):
+        record = dict(context.get())
+        record.update(level=level, text=text)
+        if player is not None:
+            record.update(player=player.name, event=event, args=args)
+        self.file.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+sink = ConsoleSink()
+threshold = sink.level
+# e.g. which game of a tournament the messages come from, every thread has its own
+# (games played concurrently in threads don't overwrite each other's context)
+context = ContextVar("context", default={})
+
+
+def set_sink(new_sink):
+    """
+    Install a new sink, the old one is closed.
+    """
+    global sink, threshold
+    if new_sink is not sink:
+        sink.close()
+    sink = new_sink
+    threshold = new_sink.level
+
+
+def set_context(**values):
+    """
+    Set the context of the following messages of the current thread.
+    """
+    context.set(values)
+
+
+def is_enabled(level):
+    return level >= threshold
+
+
+def log(level, text, *args, color=None):
+    """
+    Log a message.
+    The message is formatted (text.format(*args)) only if the level is enabled.
+    """
+    if level >= threshold:
+        sink.write(level, text.format(*args), color, None, None, args)
+
 
-def log_event(player, event):
-    log(f"{player} {event}.", player.color)
+def log_event(player, event, *args, level=EVENT):
+    """
+    Log an event of a player.
+    The event is formatted (event.format(*args)) only if the level is enabled.
+    """
+    if level >= threshold:
+        text = f"{player} {event.format(*args)}."
+        sink.write(level, text, player.color, player, event, args)
@@ -4,7 +4,7 @@ from player import Player
 from strategies import ThresholdStrategy
 import logger
 
-logger.enabled = True
+logger.set_sink(logger.ConsoleSink())
 
 game = Game([
     Player("Donald", ThresholdStrategy(0), "red"),
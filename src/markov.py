@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+import argparse
+
+import numpy as np
+
+from board import initialBoard, Horse, Trainer, SUSPENSION_INDEX
+
+DIE_SIDES = 6
+
+
+class BoardChain:
+    """
+    Movement of a player around the board as a Markov chain.
+
+    The state of a player after a turn is his position; a player on the suspension
+    field is always suspended, so the suspension field stands for "suspended".
+    In a turn the player throws a die and another one after a 6. A total of 12
+    sends him to the suspension field, otherwise he moves by the total.
+    A suspended player stays until he throws a 6 and then plays a full turn
+    from the suspension field.
+
+    The probabilities are computed exactly by linear algebra, not by simulation.
+    They don't depend on money, so they hold for every player as long as he plays.
+    """
+
+    def __init__(self, board=initialBoard, suspension_index=SUSPENSION_INDEX):
+        self.board = board
+        self.suspension_index = suspension_index
+        self.movement = self.compute_movement()
+        self.transition = self.compute_transition()
+        self.stationary = self.compute_stationary()
+        self.landing = self.compute_landing()
+        self.crossing = self.compute_crossing()
+
+    @property
+    def number_of_fields(self):
+        return len(self.board)
+
+    def compute_movement(self):
+        """
+        :return: matrix of probabilities that a player who is not suspended
+                 moves from a field (row) to a field (column) in a turn
+        """
+        n = self.number_of_fields
+        movement = np.zeros((n, n))
+        p = 1 / DIE_SIDES
+        for position in range(n):
+            for die in range(1, DIE_SIDES):
+                movement[position, (position + die) % n] += p
+                movement[position, (position + DIE_SIDES + die) % n] += p * p
+            movement[position, self.suspension_index] += p * p  # threw 12
+        return movement
+
+    def compute_transition(self):
+        """
+        :return: matrix of probabilities of states after a turn given the state before it
+        """
+        transition = self.movement.copy()
+        released = 1 / DIE_SIDES
+        transition[self.suspension_index] *= released
+        transition[self.suspension_index, self.suspension_index] += 1 - released
+        return transition
+
+    def compute_stationary(self):
+        """
+        :return: long-run probabilities of the states, i.e. the solution
+                 of pi = pi * transition with the probabilities summing to 1
+        """
+        n = self.number_of_fields
+        equations = np.vstack([self.transition.T - np.eye(n), np.ones(n)])
+        right_side = np.zeros(n + 1)
+        right_side[-1] = 1
+        return np.linalg.lstsq(equations, right_side, rcond=None)[0]
+
+    def compute_landing(self):
+        """
+        :return: long-run probabilities that a player lands on (visits) a field in a turn;
+                 they sum to less than 1 because a suspended player visits nothing
+        """
+        visits = self.movement.copy()
+        visits[self.suspension_index] *= 1 / DIE_SIDES
+        return self.stationary @ visits
+
+    def compute_crossing(self):
+        """
+        :return: long-run probability that a player crosses the start field in a turn
+                 (a player sent to the suspension field by a 12 doesn't cross it)
+        """
+        n = self.number_of_fields
+        p = 1 / DIE_SIDES
+        crossing = np.zeros(n)
+        for position in range(n):
+            for die in range(1, DIE_SIDES):
+                crossing[position] += p * (position + die >= n) \
+                    + p * p * (position + DIE_SIDES + die >= n)
+        crossing[self.suspension_index] *= 1 / DIE_SIDES
+        return self.stationary @ crossing
+
+    @property
+    def suspended(self):
+        """
+        :return: long-run probability that a player is suspended
+        """
+        return self.stationary[self.suspension_index]
+
+    def expected_horse_admission(self, horse: Horse, races: int):
+        """
+        Expected admission the owner of the horse receives from one turn of another player.
+        A suspended owner receives only the basic admission.
+        """
+        admission = (1 - self.suspended) * horse.admissions[races] \
+            + self.suspended * horse.admissions[0]
+        return self.landing[horse.index] * admission
+
+    def expected_trainer_admission(self, trainer: Trainer, number_of_trainers_owned: int):
+        """
+        Expected admission the owner of the trainer receives from one turn of another player.
+        """
+        return self.landing[trainer.index] * Trainer.ADMISSIONS[number_of_trainers_owned - 1]
+
+    def expected_admissions(self, number_of_opponents=1):
+        """
+        :return: dict property -> list of expected admissions per round by the level
+                 (number of races of a horse, number of trainers owned by the owner)
+        """
+        admissions = {}
+        for field in self.board:
+            if isinstance(field, Horse):
+                levels = [self.expected_horse_admission(field, races)
+                          for races in range(len(field.admissions))]
+            elif isinstance(field, Trainer):
+                levels = [self.expected_trainer_admission(field, number)
+                          for number in range(1, len(Trainer.ADMISSIONS) + 1)]
+            else:
+                continue
+            admissions[field] = [number_of_opponents * admission for admission in levels]
+        return admissions
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Print exact landing probabilities and expected admissions of the fields."
+    )
+    parser.add_argument("--opponents", type=int, default=1,
+                        help="number of other players paying the admissions")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    chain = BoardChain()
+    admissions = chain.expected_admissions(arguments.opponents)
+    print(f"Probability of being suspended: {chain.suspended:.4f}")
+    print(f"Probability of crossing the start field in a turn: {chain.crossing:.4f}")
+    print(f"Expected admissions per round paid by {arguments.opponents} opponent(s)")
+    print(f"{'field':<20} {'landing':>8} " + " ".join(f"{level:>8}" for level in range(6)))
+    for field, landing in zip(chain.board, chain.landing):
+        levels = " ".join(f"{admission:>8.1f}" for admission in admissions.get(field, []))
+        print(f"{field.name:<20} {landing:>8.4f} {levels}")
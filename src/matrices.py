@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+import argparse
+
+import numpy as np
+
+MATRICES = ("ahead", "met", "seat_games", "seat_wins")
+
+
+class Matrices:
+    """
+    Dense count matrices of the games of a tournament:
+      ahead[a, b]: games in which strategy a finished ahead of strategy b
+                   (players sharing a place in a tie are ahead of neither),
+      met[a, b]: games in which strategies a and b played together
+                 (met[a, a] is the number of games of strategy a),
+      seat_games[a, seat], seat_wins[a, seat]: games played and won by strategy a
+                 from a seat (0 plays first).
+    Workers count the games of a chunk into small matrices of the strategies
+    of its combination, which are added to the matrices of the tournament.
+    """
+
+    def __init__(self, number_of_strategies, number_of_players):
+        self.ahead = np.zeros((number_of_strategies, number_of_strategies), np.int64)
+        self.met = np.zeros((number_of_strategies, number_of_strategies), np.int64)
+        self.seat_games = np.zeros((number_of_strategies, number_of_players), np.int64)
+        self.seat_wins = np.zeros((number_of_strategies, number_of_players), np.int64)
+
+    def add_games(self, places, seats):
+        """
+        Count games of one combination (whose players are the strategies 0, 1, ...).
+        :param places: array (games x players) of places of the players, equal in ties
+        :param seats: array (games x players) of seats of the players
+        """
+        players = np.broadcast_to(np.arange(places.shape[1]), places.shape)
+        self.ahead += (places[:, :, None] < places[:, None, :]).sum(axis=0)
+        self.met += len(places)
+        np.add.at(self.seat_games, (players, seats), 1)
+        won = (places == 1) & ((places == 1).sum(axis=1) == 1)[:, None]
+        np.add.at(self.seat_wins, (players[won], seats[won]), 1)
+
+    def merge(self, other: 'Matrices', strategies):
+        """
+        :param other: matrices of one combination
+        :param strategies: indices of the strategies of the combination
+        """
+        strategies = np.asarray(strategies)
+        pairs = np.ix_(strategies, strategies)
+        self.ahead[pairs] += other.ahead
+        self.met[pairs] += other.met
+        self.seat_games[strategies] += other.seat_games
+        self.seat_wins[strategies] += other.seat_wins
+
+    def to_dict(self):
+        return {name: getattr(self, name).tolist() for name in MATRICES}
+
+    def restore(self, matrices):
+        """
+        :param matrices: dict written by to_dict
+        """
+        for name, values in matrices.items():
+            getattr(self, name)[...] = values
+
+    def save(self, path, strategies):
+        """
+        :param strategies: names of the strategies (rows of the matrices)
+        """
+        np.savez(path, strategies=np.array(strategies),
+                 **{name: getattr(self, name) for name in MATRICES})
+
+
+def load_matrices(path):
+    """
+    :return: tuple (names of the strategies, Matrices)
+    """
+    with np.load(path) as file:
+        matrices = Matrices(*file["seat_games"].shape)
+        for name in MATRICES:
+            setattr(matrices, name, file[name])
+        return file["strategies"].tolist(), matrices
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Print head-to-head and seat statistics.")
+    parser.add_argument("path", nargs="?", default="../matrices.npz",
+                        help="matrices written by a tournament")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    names, matrices = load_matrices(arguments.path)
+    width = max(map(len, names))
+    print("Finished ahead of the opponent in games they met [%]:")
+    print(" " * width + " " + " ".join(f"{index:>6}" for index in range(len(names))))
+    for index, name in enumerate(names):
+        rates = 100 * matrices.ahead[index] / np.maximum(matrices.met[index], 1)
+        print(f"{name:<{width}} " + " ".join(
+            f"{rate:>6.1f}" if matrices.met[index, other] and other != index else f"{'-':>6}"
+            for other, rate in enumerate(rates)
+        ) + f"  ({index})")
+    print("\nWon games by the seat [%]:")
+    print(" " * width + " " + " ".join(f"{seat + 1:>6}" for seat in range(matrices.seat_games.shape[1])))
+    for index, name in enumerate(names):
+        rates = 100 * matrices.seat_wins[index] / np.maximum(matrices.seat_games[index], 1)
+        print(f"{name:<{width}} " + " ".join(f"{rate:>6.1f}" for rate in rates))
@@ -4,7 +4,10 @@ from strategies import Strategy
 
 
 class Player:
+    __slots__ = ("id", "name", "strategy", "money", "position", "color", "suspended")
+
     def __init__(self, name: str, strategy: Strategy, color: Optional[str] = None):
+        self.id = None  # index in the order of turns, assigned by the game
         self.name = name
         self.strategy = strategy
         self.money = 30000
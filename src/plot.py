@@ -2,6 +2,10 @@
 import matplotlib.pyplot as plt
 import numpy as np
 from abc import ABC, abstractmethod
+from dataset import Dataset
+from matrices import load_matrices
+from results import read_results
+import os
 import re
 
 
@@ -9,6 +13,9 @@ class Plotter(ABC):
     """
     An abstract plotter that draws a chart.
     It loads the data (if it wasn't done before) and stores them in static variables.
+    The data are computed from the outcomes of all games ('../games'),
+    read from the streamed results ('../stats.jsonl'), even of a tournament
+    that is still running, or from the final results ('../stats.txt').
 
     Each plotter creates one charts.
     Charts are saved in the 'charts' directory in png, svg and pdf format.
@@ -18,11 +25,36 @@ class Plotter(ABC):
     combinations = None
     set_length = None
     games_of_one_player = None
+    total_games = None
+    rounds = None  # number of games by their length, only from the dataset
+    parameters = {}  # parameters of the strategies by their names, not in stats.txt
 
     def __init__(self):
         if Plotter.ranks is not None:
             return
 
+        if os.path.exists("../games/dataset.json") and os.path.exists("../stats.jsonl"):
+            statistics = Dataset("../games").statistics()
+            info = read_results("../stats.jsonl").info
+            Plotter.parameters = info.get("parameters", {})
+            Plotter.combinations = info["number_of_combinations"]
+            Plotter.set_length = info["set_length"]
+            Plotter.games_of_one_player = info["games_of_one_player"]
+            Plotter.total_games = statistics.number_of_games
+            Plotter.ranks = [rank for rank in statistics.ranks if rank[2] > 0]
+            Plotter.rounds = statistics.rounds
+            return
+
+        if os.path.exists("../stats.jsonl"):
+            results = read_results("../stats.jsonl")
+            Plotter.parameters = results.info.get("parameters", {})
+            Plotter.combinations = len(results.combinations)
+            Plotter.set_length = results.info["set_length"]
+            Plotter.games_of_one_player = results.info["games_of_one_player"]
+            Plotter.total_games = results.number_of_games
+            Plotter.ranks = [rank for rank in results.ranks if rank[2] > 0]
+            return
+
         with open("../stats.txt") as f:
             lines = f.readlines()
 
@@ -37,13 +69,11 @@ class Plotter(ABC):
 
         for line in lines:
             line_parts = line.split(" ")
-            ranks.append((line_parts[0], int(line_parts[1]), int(line_parts[2])))
+            ranks.append((line_parts[0], int(line_parts[1]), int(line_parts[2]),
+                          Plotter.games_of_one_player))
 
         Plotter.ranks = ranks
-
-    @property
-    def total_games(self):
-        return Plotter.combinations * Plotter.set_length
+        Plotter.total_games = Plotter.combinations * Plotter.set_length
 
     @property
     @abstractmethod
@@ -131,7 +161,7 @@ class WinsPlotter(BarPlotter):
 
     @property
     def title(self):
-        return f"Ranks in a tournament of {self.total_games} games" \
+        return f"Ranks in a tournament of {Plotter.total_games} games" \
                f" ({Plotter.combinations} combinations)"
 
     @property
@@ -155,7 +185,7 @@ class TiesPlotter(BarPlotter):
 
     @property
     def title(self):
-        return f"Tied games ({self.total_games} games in total)"
+        return f"Tied games ({Plotter.total_games} games in total)"
 
     @property
     def x_label(self):
@@ -166,10 +196,7 @@ class TiesPlotter(BarPlotter):
         return "Ties [%]"
 
     def compute_values(self):
-        ranks = list(map(lambda x: (x[0], (100 *
-                                           (Plotter.games_of_one_player - x[2])
-                                           / Plotter.games_of_one_player)),
-                         Plotter.ranks))
+        ranks = list(map(lambda x: (x[0], 100 * (x[3] - x[2]) / x[3]), Plotter.ranks))
         ranks.sort(key=lambda x: x[1], reverse=True)
         return ranks
 
@@ -181,7 +208,7 @@ class ThresholdPlotter(LinePlotter):
 
     @property
     def title(self):
-        return f"Ranks of Threshold strategies ({self.total_games} games)"
+        return f"Ranks of Threshold strategies ({Plotter.total_games} games)"
 
     @property
     def x_label(self):
@@ -192,15 +219,122 @@ class ThresholdPlotter(LinePlotter):
         return "Won games [%]"
 
     def compute_values(self):
-        ranks = list(map(
-            lambda x: (int(re.search("\d+", x[0]).group()), 100 * x[1] / x[2]),
-            filter(lambda x: x[0].startswith('Threshold'), Plotter.ranks)
-        ))
+        if Plotter.parameters:
+            ranks = [
+                (Plotter.parameters[rank[0]]["threshold"], 100 * rank[1] / rank[2])
+                for rank in Plotter.ranks
+                if "threshold" in Plotter.parameters.get(rank[0], {})
+            ]
+        else:
+            ranks = list(map(
+                lambda x: (int(re.search("\d+", x[0]).group()), 100 * x[1] / x[2]),
+                filter(lambda x: x[0].startswith('Threshold'), Plotter.ranks)
+            ))
 
         ranks.sort(key=lambda x: x[0])
         return ranks
 
 
+class RoundsPlotter(Plotter):
+    @property
+    def name(self):
+        return "rounds"
+
+    @property
+    def title(self):
+        return f"Length of games ({Plotter.total_games} games)"
+
+    @property
+    def x_label(self):
+        return "Rounds"
+
+    @property
+    def y_label(self):
+        return "Games [%]"
+
+    def init_plot(self):
+        rounds = Plotter.rounds
+        plt.bar(np.arange(len(rounds)), 100 * rounds / rounds.sum(), width=1)
+
+
+class MatrixPlotter(Plotter):
+    """
+    A plotter of a heat map of the head-to-head or seat matrices ('../matrices.npz').
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.strategies, self.matrices = load_matrices("../matrices.npz")
+
+    @abstractmethod
+    def compute_values(self):
+        """
+        :return: tuple (matrix of percentages, labels of the columns)
+        """
+        pass
+
+    def init_plot(self):
+        values, columns = self.compute_values()
+        plt.figure(figsize=(2 + .6 * len(columns), 2 + .4 * len(self.strategies)))
+        plt.imshow(values, cmap="RdYlGn", vmin=0, vmax=100)
+        plt.colorbar(label="%")
+        plt.xticks(np.arange(len(columns)), columns, rotation=70)
+        plt.yticks(np.arange(len(self.strategies)), self.strategies)
+
+
+class HeadToHeadPlotter(MatrixPlotter):
+    @property
+    def name(self):
+        return "head_to_head"
+
+    @property
+    def title(self):
+        return "Finished ahead of the opponent [%]"
+
+    @property
+    def x_label(self):
+        return "Opponent"
+
+    @property
+    def y_label(self):
+        return "Strategy"
+
+    def compute_values(self):
+        met = self.matrices.met.astype(float)
+        np.fill_diagonal(met, 0)
+        met[met == 0] = np.nan  # strategies that never met
+        return 100 * self.matrices.ahead / met, self.strategies
+
+
+class SeatPlotter(MatrixPlotter):
+    @property
+    def name(self):
+        return "seats"
+
+    @property
+    def title(self):
+        return "Won games by the seat [%]"
+
+    @property
+    def x_label(self):
+        return "Seat (order of turns)"
+
+    @property
+    def y_label(self):
+        return "Strategy"
+
+    def compute_values(self):
+        games = self.matrices.seat_games.astype(float)
+        games[games == 0] = np.nan
+        return 100 * self.matrices.seat_wins / games, \
+            [str(seat + 1) for seat in range(games.shape[1])]
+
+
 WinsPlotter().plot()
 TiesPlotter().plot()
 ThresholdPlotter().plot()
+if Plotter.rounds is not None:
+    RoundsPlotter().plot()
+if os.path.exists("../matrices.npz"):
+    HeadToHeadPlotter().plot()
+    SeatPlotter().plot()
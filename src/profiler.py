@@ -0,0 +1,94 @@
+from collections import Counter
+from time import perf_counter
+import json
+
+
+class Profiler:
+    """
+    Records call counts and cumulative time of the phases of games:
+    the whole turns, dice, movement, visits of every type of field,
+    decisions of every strategy and bankruptcy cleanups.
+
+    A profiler is attached to a game by wrapping the game's methods
+    in its instance, so games without a profiler don't pay anything.
+    Phases nest (a movement includes a visit, a visit includes a decision),
+    so besides the total time, the own time without the nested phases is kept.
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self.total_times = Counter()
+        self.own_times = Counter()
+        self.nested_times = []  # time of nested phases for every running phase
+
+    def attach(self, game):
+        game.play_turn = self.wrap("turn", game.play_turn)
+        game.throw_die = self.wrap("dice", game.throw_die)
+        game.move_player = self.wrap("movement", game.move_player)
+        game.free_losers_properties = self.wrap("bankruptcy", game.free_losers_properties)
+
+        visit_field = game.visit_field
+
+        def profiled_visit_field(field):
+            return self.measure(f"visit.{type(field).__name__}", visit_field, field)
+
+        game.visit_field = profiled_visit_field
+
+        controller = game.controller
+        for method_name, decision in (
+                ("ask_player_whether_he_wants_property", "decide_whether_to_buy_property"),
+                ("ask_player_whether_he_wants_new_race", "decide_whether_to_buy_race"),
+        ):
+            setattr(controller, method_name,
+                    self.wrap_decision(game, decision, getattr(controller, method_name)))
+
+    def wrap_decision(self, game, decision, ask):
+        def profiled_ask(property):
+            strategy_name = type(game.current_player.strategy).__name__
+            return self.measure(f"decision.{strategy_name}.{decision}", ask, property)
+        return profiled_ask
+
+    def wrap(self, name, function):
+        def profiled(*args, **kwargs):
+            return self.measure(name, function, *args, **kwargs)
+        return profiled
+
+    def measure(self, name, function, *args, **kwargs):
+        self.nested_times.append(0)
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            nested_time = self.nested_times.pop()
+            self.calls[name] += 1
+            self.total_times[name] += elapsed
+            self.own_times[name] += elapsed - nested_time
+            if self.nested_times:
+                self.nested_times[-1] += elapsed
+
+    def merge(self, other: 'Profiler'):
+        self.calls.update(other.calls)
+        self.total_times.update(other.total_times)
+        self.own_times.update(other.own_times)
+
+    def to_dict(self):
+        return {
+            name: {
+                "calls": self.calls[name],
+                "total_time": self.total_times[name],
+                "own_time": self.own_times[name],
+            }
+            for name in sorted(self.calls)
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def print_report(self):
+        print(f"\n{'phase':<62} {'calls':>10} {'total [s]':>10} {'own [s]':>10} {'mean [us]':>10}")
+        for name in sorted(self.calls, key=self.own_times.get, reverse=True):
+            calls = self.calls[name]
+            print(f"{name:<62} {calls:>10} {self.total_times[name]:>10.3f} "
+                  f"{self.own_times[name]:>10.3f} {1e6 * self.total_times[name] / calls:>10.2f}")
@@ -0,0 +1,116 @@
+import math
+
+MU = 25.0
+SIGMA = MU / 3
+BETA = SIGMA / 2  # uncertainty of the performance in one game
+KAPPA = 1e-4  # lower bound of the factor shrinking sigma
+
+
+class Rating:
+    """
+    Skill of a strategy as a normal distribution: mean mu and uncertainty sigma.
+    """
+
+    __slots__ = ("mu", "sigma")
+
+    def __init__(self, mu=MU, sigma=SIGMA):
+        self.mu = mu
+        self.sigma = sigma
+
+    @property
+    def conservative(self):
+        """
+        :return: the skill the strategy has with high probability (mu - 3 sigma),
+                 used for ranking so that strategies with few games aren't overrated
+        """
+        return self.mu - 3 * self.sigma
+
+    def to_list(self):
+        return [self.mu, self.sigma]
+
+    def __repr__(self):
+        return f"Rating({self.mu:.2f}, {self.sigma:.2f})"
+
+
+class RatingSystem:
+    """
+    Online ratings of strategies computed from the places of the players in every game,
+    by the Bayesian approximation of Weng and Lin with the Plackett-Luce model
+    (the model behind TrueSkill-like multiplayer ratings, without its iterative inference).
+
+    Players with the same place are tied: in a game without a winner, all the players
+    who didn't go bankrupt share the first place and the bankrupt ones are ranked
+    below them in the order of their bankruptcies.
+    An update is a single pass over the players, O(players) per game,
+    so the ratings can be updated after every game as the tournament goes.
+    """
+
+    def __init__(self, names=()):
+        self.ratings = {name: Rating() for name in names}
+        self.number_of_games = 0
+
+    def __getitem__(self, name) -> Rating:
+        rating = self.ratings.get(name)
+        if rating is None:
+            rating = self.ratings[name] = Rating()
+        return rating
+
+    def update(self, names, places):
+        """
+        Update the ratings of the players of one game.
+        :param names: names of the strategies of the players
+        :param places: place of every player (1 for the winner, equal places for ties)
+        """
+        ratings = [self[name] for name in names]
+        c = math.sqrt(sum(rating.sigma ** 2 + BETA ** 2 for rating in ratings))
+        strengths = [math.exp(rating.mu / c) for rating in ratings]
+
+        # sums of the strengths of the players at every place or a worse one
+        strength_from = {}
+        players_at = {}
+        for place, strength in zip(places, strengths):
+            strength_from[place] = strength_from.get(place, 0) + strength
+            players_at[place] = players_at.get(place, 0) + 1
+        ordered_places = sorted(strength_from)
+        for better, worse in zip(reversed(ordered_places[:-1]), reversed(ordered_places[1:])):
+            strength_from[better] += strength_from[worse]
+
+        # for every place, sums of 1/S and 1/S^2 over it and the better places,
+        # S being the strength from the place on (the Plackett-Luce terms)
+        inverse_sums = {}
+        squared_inverse_sums = {}
+        inverse_sum = squared_inverse_sum = 0
+        for place in ordered_places:
+            inverse_sum += 1 / strength_from[place]
+            squared_inverse_sum += 1 / strength_from[place] ** 2
+            inverse_sums[place] = inverse_sum
+            squared_inverse_sums[place] = squared_inverse_sum
+
+        for rating, place, strength in zip(ratings, places, strengths):
+            omega = 1 / players_at[place] - strength * inverse_sums[place]
+            delta = strength * inverse_sums[place] - strength ** 2 * squared_inverse_sums[place]
+            variance = rating.sigma ** 2
+            rating.mu += variance / c * omega
+            rating.sigma *= math.sqrt(max(1 - rating.sigma / c * variance / c ** 2 * delta, KAPPA))
+        self.number_of_games += 1
+
+    @property
+    def ranks(self):
+        """
+        :return: list of tuples (name, rating) sorted by the conservative skill
+        """
+        return sorted(self.ratings.items(), key=lambda item: item[1].conservative, reverse=True)
+
+    def to_dict(self, names=None):
+        """
+        :return: dict name -> [mu, sigma] (of the given strategies or all of them)
+        """
+        return {name: self.ratings[name].to_list() for name in (names or self.ratings)}
+
+    def restore(self, ratings, number_of_games=0):
+        """
+        :param ratings: dict name -> [mu, sigma] written by to_dict
+        """
+        for name, (mu, sigma) in ratings.items():
+            self.ratings[name] = Rating(mu, sigma)
+        self.number_of_games = number_of_games
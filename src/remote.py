@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+from board import Horse, Property
+from strategies import Strategy, PROPERTY, RACE
+from tournament import Tournament, play_chunk
+
+
+class DecisionRequest:
+    """
+    A decision a remote strategy has to make, with the state of the game it depends on.
+    """
+
+    __slots__ = ("model", "kind", "field", "price", "money", "round", "horses_of_stable")
+
+    def __init__(self, model, kind, field, price, money, round, horses_of_stable):
+        self.model = model
+        self.kind = kind
+        self.field = field
+        self.price = price
+        self.money = money
+        self.round = round
+        self.horses_of_stable = horses_of_stable
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Backend(ABC):
+    """
+    A decision maker outside the game, e.g. a model server.
+    It gets the pending decisions of all the games in a single request.
+    """
+
+    @abstractmethod
+    async def decide(self, requests) -> list:
+        """
+        :param requests: list of DecisionRequest
+        :return: list of decisions (bool), one for every request
+        """
+        pass
+
+
+class LocalBackend(Backend):
+    """
+    A local stand-in for a model server: every request takes the given latency
+    (however many decisions it holds) and the decisions are made by local policies.
+    """
+
+    def __init__(self, policies, latency=0.02):
+        """
+        :param policies: dict model name -> function DecisionRequest -> bool
+        :param latency: seconds of the round trip of one request
+        """
+        self.policies = policies
+        self.latency = latency
+
+    async def decide(self, requests) -> list:
+        await asyncio.sleep(self.latency)
+        return [self.policies[request.model](request) for request in requests]
+
+
+def threshold_policy(threshold):
+    """
+    :return: policy deciding as ThresholdStrategy(threshold)
+    """
+    def decide(request: DecisionRequest):
+        return request.money - request.price > threshold
+    return decide
+
+
+class DecisionBatcher:
+    """
+    Collects the decisions requested by games running at the same time
+    and sends them to the backend in batches.
+    A batch is sent when it is full or when no new decision came for a while,
+    and the next one is collected while the backend answers, so the number
+    of decisions per second grows with the number of games instead of being
+    bound by the latency of the backend.
+    """
+
+    def __init__(self, backend: Backend, max_batch_size=256, max_delay=0.002):
+        """
+        :param max_batch_size: maximum number of decisions in one request
+        :param max_delay: seconds to wait for more decisions before a batch is sent
+        """
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.loop = None
+        self.queue = None
+        self.pending = set()  # futures of the decisions which haven't been made yet
+        self.closed = False
+        self.number_of_batches = 0
+        self.number_of_requests = 0
+
+    async def run(self):
+        """
+        Send the batches until cancelled.
+        """
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        pending = set()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), self.max_delay))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self.send(batch))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+    async def send(self, batch):
+        requests = [request for request, future in batch]
+        try:
+            decisions = await self.backend.decide(requests)
+        except Exception as exception:
+            for request, future in batch:
+                if not future.done():
+                    future.set_exception(exception)
+            return
+        self.number_of_batches += 1
+        self.number_of_requests += len(batch)
+        for (request, future), decision in zip(batch, decisions):
+            if not future.done():
+                future.set_result(bool(decision))
+
+    async def submit(self, request: DecisionRequest):
+        if self.closed:
+            raise RuntimeError("The decision batcher is closed.")
+        future = self.loop.create_future()
+        self.pending.add(future)
+        future.add_done_callback(self.pending.discard)
+        self.queue.put_nowait((request, future))
+        return await future
+
+    def close(self):
+        """
+        Fail all the decisions which haven't been made yet and any later ones,
+        so that no game waits for a decision forever (call it on the event loop).
+        """
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        for future in list(self.pending):
+            if not future.done():
+                future.set_exception(RuntimeError("The decision batcher was closed."))
+
+    def decide(self, request: DecisionRequest) -> bool:
+        """
+        Make a decision from a thread playing a game (blocks the thread until it is made).
+        """
+        return asyncio.run_coroutine_threadsafe(self.submit(request), self.loop).result()
+
+    @property
+    def mean_batch_size(self):
+        return self.number_of_requests / max(self.number_of_batches, 1)
+
+
+class RemoteStrategy(Strategy):
+    """
+    A strategy whose decisions are made by a backend (through a DecisionBatcher).
+    The batcher is connected by the driver playing the games.
+    """
+
+    def __init__(self, model):
+        """
+        :param model: name of the model of the backend making the decisions
+        """
+        self.model = model
+        self.batcher = None
+
+    @property
+    def parameters(self) -> dict:
+        return {"model": self.model}
+
+    def decide_whether_to_buy_property(self, controller, property: Property) -> bool:
+        return self.request(controller, PROPERTY, property, property.price)
+
+    def decide_whether_to_buy_race(self, controller, horse: Horse) -> bool:
+        return self.request(controller, RACE, horse, horse.new_race_price)
+
+    def request(self, controller, kind, property, price):
+        horses_of_stable = controller.number_of_horses_of_stable_owned_by_player(
+            property.stable, controller.player_id
+        ) if isinstance(property, Horse) else 0
+        return self.batcher.decide(DecisionRequest(
+            self.model, kind, property.index, price, controller.player_money,
+            controller.current_round, horses_of_stable
+        ))
+
+
+class RemoteTournament(Tournament):
+    """
+    A tournament of (also) remote strategies driven by asyncio.
+    Chunks of games run concurrently in threads awaited by the event loop, so while
+    the games wait for their decisions, the decisions of all of them are sent to the
+    backend in one request. Games are played and merged in the same way as by Tournament,
+    so the results are the same as if the decisions were made locally.
+    """
+
+    def __init__(self, number_of_players, set_length, strategies, backend: Backend,
+                 concurrency=64, max_batch_size=256, max_delay=0.002, **kwargs):
+        """
+        :param concurrency: number of games played at the same time
+        :param max_batch_size: maximum number of decisions in one request to the backend
+        :param max_delay: seconds to wait for more decisions before a request is sent
+        """
+        kwargs["workers"] = 1
+        kwargs["engine"] = "reference"
+        super().__init__(number_of_players, set_length, strategies, **kwargs)
+        self.concurrency = concurrency
+        self.batcher = DecisionBatcher(backend, max_batch_size, max_delay)
+        for strategy in self.strategies:
+            if isinstance(strategy[0], RemoteStrategy):
+                strategy[0].batcher = self.batcher
+
+    @property
+    def chunk_size(self):
+        return 1  # every game waits for its decisions on its own
+
+    def play_chunks(self, map_chunks):
+        asyncio.run(self.play_chunks_concurrently())
+
+    async def play_chunks_concurrently(self):
+        batcher = asyncio.create_task(self.batcher.run())
+        await asyncio.sleep(0)  # let the batcher start
+        loop = asyncio.get_running_loop()
+        chunks = list(self.compute_chunks())[self.completed_chunks:]
+        executor = ThreadPoolExecutor(self.concurrency)  # the threads share the log sink
+        running = []
+        try:
+            # at most concurrency chunks are played (or waiting to be merged) at once
+            for chunk in chunks:
+                running.append((chunk, loop.run_in_executor(executor, play_chunk, chunk)))
+                if len(running) >= self.concurrency:
+                    chunk, result = running.pop(0)
+                    self.merge_results(chunk, await result)
+            while running:
+                chunk, result = running.pop(0)
+                self.merge_results(chunk, await result)
+        finally:
+            # when a chunk failed (or the tournament was interrupted), the other games
+            # may be waiting for decisions, which only the event loop can make,
+            # so they are failed and their threads are waited for on the loop
+            batcher.cancel()
+            self.batcher.close()
+            executor.shutdown(wait=False, cancel_futures=True)
+            await asyncio.gather(*(result for chunk, result in running), return_exceptions=True)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Play a tournament of remote threshold strategies with a simulated latency."
+    )
+    parser.add_argument("--set-length", type=int, default=20,
+                        help="number of games of every combination of players")
+    parser.add_argument("--latency", type=float, default=.02,
+                        help="seconds of the round trip of one request to the backend")
+    parser.add_argument("--concurrency", type=int, default=64,
+                        help="number of games played at the same time")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    thresholds = [0, 1000, 3000, 10000]
+    backend = LocalBackend({f"threshold-{threshold}": threshold_policy(threshold)
+                            for threshold in thresholds}, arguments.latency)
+    tournament = RemoteTournament(
+        3, arguments.set_length,
+        [[RemoteStrategy(f"threshold-{threshold}"), f"Remote{threshold}"] for threshold in thresholds],
+        backend, concurrency=arguments.concurrency, seed=arguments.seed,
+        results_file=None, checkpoint_file=None, dataset_directory=None, matrices_file=None
+    )
+    start = time.perf_counter()
+    tournament.play()
+    elapsed = time.perf_counter() - start
+    batcher = tournament.batcher
+    print(f"{tournament.total_number_of_games} games in {elapsed:.1f} s, "
+          f"{batcher.number_of_requests} decisions in {batcher.number_of_batches} requests "
+          f"({batcher.mean_batch_size:.1f} decisions per request, "
+          f"{batcher.number_of_requests / elapsed:.0f} decisions per second).")
+    for name, rating in tournament.ratings.ranks:
+        wins = tournament.wins[name]
+        non_tie_games = tournament.number_of_games_by_players[name]
+        print(f"{name}: {wins} ({100 * wins // max(non_tie_games, 1)}%, "
+              f"{non_tie_games} non-tie games), rating {rating.mu:.2f} +- {rating.sigma:.2f}")
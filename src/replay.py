@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import struct
+import zlib
+
+from board import initialBoard, Horse
+
+# kinds of events
+TURN = 1  # a player starts his turn, value = round
+DIE = 2  # value = number thrown
+MOVE = 3  # arg = position, value = bonus received for crossing the start field
+BUY = 4  # arg = field index, value = price
+RACE = 5  # arg = field index, value = price
+ADMISSION = 6  # arg = index of the receiving player, value = amount
+FEE = 7  # value = amount paid to the bank
+SUSPEND = 8
+BANKRUPT = 9
+DECLINED = 0x80  # flag of a declined BUY or RACE offer
+
+EVENT_NAMES = {TURN: "turn", DIE: "die", MOVE: "move", BUY: "buy", RACE: "race",
+               ADMISSION: "admission", FEE: "fee", SUSPEND: "suspend", BANKRUPT: "bankrupt"}
+
+# kind, player index, argument, value
+RECORD = struct.Struct("<BBHi")
+LENGTH = struct.Struct("<I")
+
+
+class TraceRecorder:
+    """
+    Records the events of one game in a compact binary form.
+    Every event is a fixed size record (kind, player, argument, value) of 8 bytes.
+    Players are referred to by their ids (index in the order of turns).
+    Offers of properties and races declined by a strategy are recorded
+    as the BUY and RACE events with the DECLINED flag.
+
+    Like Profiler, a recorder is attached to a game by wrapping the game's methods
+    in its instance, so games without a recorder don't pay anything.
+    """
+
+    def __init__(self, **info):
+        """
+        :param info: anything identifying the game (e.g. combination and game index),
+                     stored in the header of the trace
+        """
+        self.info = info
+        self.records = bytearray()
+        self.turn_depth = 0
+        self.bank_money_before_move = 0
+
+    def attach(self, game):
+        self.info.update(
+            players=[player.name for player in game.players],
+            strategies=[type(player.strategy).__name__ for player in game.players],
+            money=[player.money for player in game.players],
+            bank_money=game.bank_money,
+        )
+        record = self.record
+
+        play_turn = game.play_turn
+
+        def traced_play_turn(player):
+            if not self.turn_depth:  # a released player plays his turn from within the turn
+                record(TURN, player.id, 0, game.round)
+            self.turn_depth += 1
+            try:
+                return play_turn(player)
+            finally:
+                self.turn_depth -= 1
+
+        throw_die = game.throw_die
+
+        def traced_throw_die():
+            die = throw_die()
+            record(DIE, game.current_player.id, 0, die)
+            return die
+
+        move_player = game.move_player
+
+        def traced_move_player(*args, **kwargs):
+            self.bank_money_before_move = game.bank_money
+            return move_player(*args, **kwargs)
+
+        visit_field = game.visit_field
+
+        def traced_visit_field(field):
+            # the only payment between starting a move and visiting the field is the bonus
+            record(MOVE, game.current_player.id, field.index,
+                   self.bank_money_before_move - game.bank_money)
+            return visit_field(field)
+
+        free_losers_properties = game.free_losers_properties
+
+        def traced_free_losers_properties(loser):
+            record(BANKRUPT, loser.id, 0, loser.money)
+            return free_losers_properties(loser)
+
+        game.play_turn = traced_play_turn
+        game.throw_die = traced_throw_die
+        game.move_player = traced_move_player
+        game.visit_field = traced_visit_field
+        game.free_losers_properties = traced_free_losers_properties
+
+        controller = game.controller
+        ask_player_whether_he_wants_property = controller.ask_player_whether_he_wants_property
+        ask_player_whether_he_wants_new_race = controller.ask_player_whether_he_wants_new_race
+        buy_property_for_player = controller.buy_property_for_player
+        buy_new_race_for_player = controller.buy_new_race_for_player
+        pay_admission_to_another_player = controller.pay_admission_to_another_player
+        pay_fee_to_bank = controller.pay_fee_to_bank
+        suspend_player = controller.suspend_player
+
+        def traced_ask_player_whether_he_wants_property(property):
+            wanna_buy = ask_player_whether_he_wants_property(property)
+            if not wanna_buy:
+                record(BUY | DECLINED, game.current_player.id, property.index, property.price)
+            return wanna_buy
+
+        def traced_ask_player_whether_he_wants_new_race(horse):
+            wanna_buy = ask_player_whether_he_wants_new_race(horse)
+            if not wanna_buy:
+                record(RACE | DECLINED, game.current_player.id, horse.index, horse.new_race_price)
+            return wanna_buy
+
+        def traced_buy_property_for_player(property):
+            record(BUY, game.current_player.id, property.index, property.price)
+            return buy_property_for_player(property)
+
+        def traced_buy_new_race_for_player(horse):
+            record(RACE, game.current_player.id, horse.index, horse.new_race_price)
+            return buy_new_race_for_player(horse)
+
+        def traced_pay_admission_to_another_player(receiver_id, amount, purpose):
+            record(ADMISSION, game.current_player.id, receiver_id, amount)
+            return pay_admission_to_another_player(receiver_id, amount, purpose)
+
+        def traced_pay_fee_to_bank(amount, purpose):
+            record(FEE, game.current_player.id, 0, amount)
+            return pay_fee_to_bank(amount, purpose)
+
+        def traced_suspend_player():
+            record(SUSPEND, game.current_player.id, 0, 0)
+            return suspend_player()
+
+        controller.ask_player_whether_he_wants_property = traced_ask_player_whether_he_wants_property
+        controller.ask_player_whether_he_wants_new_race = traced_ask_player_whether_he_wants_new_race
+        controller.buy_property_for_player = traced_buy_property_for_player
+        controller.buy_new_race_for_player = traced_buy_new_race_for_player
+        controller.pay_admission_to_another_player = traced_pay_admission_to_another_player
+        controller.pay_fee_to_bank = traced_pay_fee_to_bank
+        controller.suspend_player = traced_suspend_player
+
+    def record(self, kind, player_id, arg, value):
+        self.records += RECORD.pack(kind, player_id, arg, value)
+
+    def encode(self):
+        """
+        :return: the trace as bytes: length of the header, JSON header,
+                 length of the records and the zlib compressed records
+        """
+        header = json.dumps(self.info, ensure_ascii=False).encode("utf-8")
+        records = zlib.compress(self.records)
+        return LENGTH.pack(len(header)) + header + LENGTH.pack(len(records)) + records
+
+
+class GameTrace:
+    """
+    A decoded trace of one game.
+    """
+
+    def __init__(self, info, records):
+        """
+        :param info: header of the trace
+        :param records: list of tuples (kind, player index, argument, value)
+        """
+        self.info = info
+        self.records = records
+
+    @property
+    def players(self):
+        return self.info["players"]
+
+    @property
+    def number_of_turns(self):
+        return sum(1 for record in self.records if record[0] == TURN)
+
+
+class TraceWriter:
+    """
+    A writer appending traces of games to a file.
+    A resumed tournament appends to the traces written before its checkpoint
+    and cuts off the later ones, whose games are played again.
+    """
+
+    def __init__(self, path, append=False, offset=None):
+        """
+        :param offset: size of the file kept when appending (None for all of it)
+        """
+        self.file = open(path, "ab" if append else "wb")
+        if append and offset is not None:
+            self.file.truncate(offset)
+        self.offset = self.file.seek(0, os.SEEK_END)  # bytes written to the file
+
+    def write(self, trace: bytes):
+        self.file.write(trace)
+        self.offset += len(trace)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def read_traces(path):
+    """
+    Read traces of games from a file one by one.
+    A trace cut off at the end of the file (by a crash) is ignored.
+    :return: generator of GameTrace
+    """
+    with open(path, "rb") as file:
+        while True:
+            length = file.read(LENGTH.size)
+            if len(length) < LENGTH.size:
+                return
+            info = file.read(LENGTH.unpack(length)[0])
+            length = file.read(LENGTH.size)
+            if len(length) < LENGTH.size:
+                return
+            records = file.read(LENGTH.unpack(length)[0])
+            if len(records) < LENGTH.unpack(length)[0]:
+                return
+            yield GameTrace(json.loads(info), list(RECORD.iter_unpack(zlib.decompress(records))))
+
+
+class ReplayState:
+    """
+    The state of a game rebuilt from its trace.
+    """
+
+    def __init__(self, trace: GameTrace, board=initialBoard):
+        self.board = board
+        self.players = trace.players
+        self.money = list(trace.info["money"])
+        self.positions = [0] * len(self.players)
+        self.suspended = [False] * len(self.players)
+        self.bankrupt = [False] * len(self.players)
+        self.owners = [None] * len(board)  # field index -> player index
+        self.races = [0] * len(board)
+        self.declined = [0] * len(self.players)  # offers declined by each player
+        self.bank_money = trace.info["bank_money"]
+        self.round = 0
+        self.turn = 0
+
+    def check_offer(self, kind, player, field_index):
+        """
+        Check that the rebuilt state allows the offer the trace records.
+        """
+        field = self.board[field_index]
+        if kind & ~DECLINED == BUY:
+            offered = self.owners[field_index] is None
+        else:  # a race is offered to the owner of the whole stable
+            offered = self.owners[field_index] == player and self.races[field_index] < 5 and \
+                all(self.owners[horse.index] == player for horse in self.board
+                    if isinstance(horse, Horse) and horse.stable == field.stable)
+        # the price of the property is checked for races too, as the game does
+        if not offered or self.money[player] < field.price:
+            raise ValueError(f"The trace offers {field} to {self.players[player]} in turn {self.turn}, "
+                             f"which the game couldn't do.")
+
+    def apply(self, record):
+        kind, player, arg, value = record
+        if kind in (BUY, RACE, BUY | DECLINED, RACE | DECLINED):
+            self.check_offer(kind, player, arg)
+        if kind & DECLINED:
+            self.declined[player] += 1
+        elif kind == TURN:
+            self.round = value
+            self.turn += 1
+        elif kind == DIE:
+            if self.suspended[player] and value == 6:
+                self.suspended[player] = False
+        elif kind == MOVE:
+            self.positions[player] = arg
+            self.money[player] += value
+            self.bank_money -= value
+        elif kind in (BUY, RACE, FEE):
+            self.money[player] -= value
+            self.bank_money += value
+            if kind == BUY:
+                self.owners[arg] = player
+            elif kind == RACE:
+                self.races[arg] += 1
+        elif kind == ADMISSION:
+            self.money[player] -= value
+            self.money[arg] += value
+        elif kind == SUSPEND:
+            self.suspended[player] = True
+        elif kind == BANKRUPT:
+            self.bankrupt[player] = True
+            self.bank_money += self.money[player]
+            for index, owner in enumerate(self.owners):
+                if owner == player:
+                    self.owners[index] = None
+                    self.races[index] = 0
+
+    def print(self):
+        print(f"Round {self.round}, turn {self.turn}, bank: {self.bank_money:,} Kč")
+        for index, name in enumerate(self.players):
+            status = " (bankrupt)" if self.bankrupt[index] else \
+                " (suspended)" if self.suspended[index] else ""
+            properties = []
+            for field in self.board:
+                if self.owners[field.index] == index:
+                    if isinstance(field, Horse) and self.races[field.index]:
+                        properties.append(f"{field} ({self.races[field.index]} races)")
+                    else:
+                        properties.append(str(field))
+            print(f"  {name}: {self.money[index]:,} Kč on {self.board[self.positions[index]]}"
+                  f"{status}; owns {', '.join(properties) or 'nothing'}; "
+                  f"declined {self.declined[index]} offers")
+
+
+def replay(trace: GameTrace, turn=None):
+    """
+    Rebuild the state of a game from its trace without playing it.
+    :param turn: number of turns to replay (None for the whole game)
+    :return: ReplayState after the turn
+    """
+    state = ReplayState(trace)
+    for record in trace.records:
+        if record[0] == TURN and state.turn == turn:
+            break
+        state.apply(record)
+    return state
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Replay games recorded by a tournament.")
+    parser.add_argument("path", help="trace file written by ./tournament.py --trace-file")
+    parser.add_argument("--combination", type=int, default=None)
+    parser.add_argument("--game", type=int, default=None)
+    parser.add_argument("--turn", type=int, default=None,
+                        help="show the state after this turn (the end of the game by default)")
+    parser.add_argument("--events", action="store_true", help="print the events of the game")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    for trace in read_traces(arguments.path):
+        if arguments.combination is not None and trace.info.get("combination") != arguments.combination \
+                or arguments.game is not None and trace.info.get("game") != arguments.game:
+            continue
+        print(f"Combination {trace.info.get('combination')}, game {trace.info.get('game')}: "
+              f"{', '.join(trace.players)} ({trace.number_of_turns} turns)")
+        if arguments.events:
+            for kind, player, arg, value in trace.records:
+                name = EVENT_NAMES[kind & ~DECLINED] + (" declined" if kind & DECLINED else "")
+                print(f"  {name:<14} {trace.players[player]:<16} {arg:>5} {value:>8}")
+        replay(trace, arguments.turn).print()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+import argparse
+import math
+import time
+
+from board import initialBoard, Property, Horse, Trainer, VeterinaryCheckup
+from game import Game, START_BONUS
+from markov import BoardChain
+from player import Player
+from strategies import ThresholdStrategy, NoCheapHorsesStrategy, ScoreStrategy
+import logger
+
+PROPERTY_INDICES = [field.index for field in initialBoard if isinstance(field, Property)]
+NUMBER_OF_OTHER_FIELDS = len(initialBoard) - len(PROPERTY_INDICES)  # never owned
+STABLE_INDICES = {}  # stable -> indices of its horses
+for _field in initialBoard:
+    if isinstance(_field, Horse):
+        STABLE_INDICES.setdefault(_field.stable, []).append(_field.index)
+
+_tables = None
+
+
+def expected_tables():
+    """
+    :return: tuple (admissions, fee, crossing) computed once per process, where
+      admissions: list of tuples (field index, whether it's a horse, levels) of the properties,
+                  levels are tuples (mean, mean of squares) of the admission paid in one turn
+                  of a player by the level of the property (number of races of a horse,
+                  number of trainers owned by the owner of a trainer - 1),
+      fee: tuple (mean, mean of squares) of the fees paid in one turn,
+      crossing: probability of crossing the start field in one turn
+    """
+    global _tables
+    if _tables is None:
+        chain = BoardChain()
+        suspended = chain.suspended
+        admissions = []
+        for field in initialBoard:
+            landing = chain.landing[field.index]
+            if isinstance(field, Horse):
+                # a suspended owner receives only the basic admission
+                admissions.append((field.index, True, [
+                    (landing * ((1 - suspended) * admission + suspended * field.admissions[0]),
+                     landing * ((1 - suspended) * admission ** 2
+                                + suspended * field.admissions[0] ** 2))
+                    for admission in field.admissions
+                ]))
+            elif isinstance(field, Trainer):
+                admissions.append((field.index, False, [
+                    (landing * admission, landing * admission ** 2)
+                    for admission in Trainer.ADMISSIONS
+                ]))
+        fees = [(chain.landing[field.index], field.fee)
+                for field in initialBoard if isinstance(field, VeterinaryCheckup)]
+        fee = (sum(landing * fee for landing, fee in fees),
+               sum(landing * fee ** 2 for landing, fee in fees))
+        _tables = admissions, fee, chain.crossing
+    return _tables
+
+
+class EarlyResolution:
+    """
+    Ends games whose outcome is (almost) certain long before the last round.
+
+    Every few rounds, once all the properties are owned (no more purchases can
+    turn the game), the expected change of money of every player per round (drift)
+    and its variance are computed from the board tables: admissions received from
+    and paid to the other players weighted by the long-run landing probabilities
+    (BoardChain), fees and bonuses. Money is then a random walk with that drift:
+      - If all the players but one would be ruined within the horizon even if they
+        were z standard deviations luckier than expected, the one would survive it even
+        if he were z standard deviations unluckier, and the players to be ruined have
+        lost money since the last check (the money trajectory agrees with the drifts),
+        the game ends with the projected rank (the ruined players ordered by the
+        expected rounds to their bankruptcies).
+      - If no more races can be bought and every player would keep his money
+        until the last round even if he were z standard deviations unluckier,
+        the game ends as a tie.
+    A projected outcome is used only if it was the same at the previous check.
+    Checks cost more than the late rounds of a game, so after every check without
+    any projected outcome, the interval to the next one doubles (up to max_interval).
+    """
+
+    def __init__(self, interval=10, horizon=60, z=4.0, minimum_round=50, max_interval=80):
+        """
+        :param interval: number of rounds between the checks
+        :param max_interval: maximum number of rounds between the checks
+        :param horizon: maximum number of rounds to the projected end of a decided game
+        :param z: number of standard deviations of money the projections must withstand
+        :param minimum_round: first round that can be checked
+        """
+        self.interval = interval
+        self.horizon = horizon
+        self.z = z
+        self.max_interval = max_interval
+        self.next_round = minimum_round  # round of the next check
+        self.next_interval = interval
+        self.previous_outcome = None
+        self.previous_money = None
+
+    def resolve(self, game: Game):
+        """
+        :return: None to continue the game, the projected rank (names from the winner)
+                 or False for a tie
+        """
+        if game.board_state.owners.count(None) > NUMBER_OF_OTHER_FIELDS:
+            self.next_round = game.round + self.interval
+            self.previous_outcome = self.previous_money = None
+            return None
+        money = [player.money for player in game.players]
+        previous_money, self.previous_money = self.previous_money, money
+
+        alive = game.players_alive
+        drifts, variances = self.compute_drifts(game)
+        horizon = self.horizon
+        remaining = game.max_rounds - game.round
+        ruined = [player for player in alive
+                  if money[player.id] + drifts[player.id] * horizon
+                  + self.z * math.sqrt(variances[player.id] * horizon) < 0]
+        if len(ruined) == len(alive) - 1:
+            winner = next(player for player in alive if player not in ruined)
+            survives = money[winner.id] + drifts[winner.id] * horizon \
+                - self.z * math.sqrt(variances[winner.id] * horizon) > 0
+            losing = previous_money is not None \
+                and all(money[player.id] < previous_money[player.id] for player in ruined)
+            if survives and losing:
+                ruined.sort(key=lambda player: money[player.id] / -drifts[player.id])
+                outcome = [winner.name] + [player.name for player in reversed(ruined)] + game.rank
+            else:
+                outcome = None
+        elif not ruined and not self.can_buy_races(game) and all(
+                money[player.id] + drifts[player.id] * remaining
+                - self.z * math.sqrt(variances[player.id] * remaining) > 0
+                for player in alive):
+            outcome = False
+        else:
+            outcome = None
+
+        previous_outcome, self.previous_outcome = self.previous_outcome, outcome
+        if outcome is None:
+            self.next_interval = min(2 * self.next_interval, self.max_interval)
+        else:
+            self.next_interval = self.interval
+        self.next_round = game.round + self.next_interval
+        return outcome if outcome == previous_outcome else None
+
+    @staticmethod
+    def can_buy_races(game: Game):
+        """
+        :return: whether any player owns a whole stable with a horse that can still race more
+        """
+        state = game.board_state
+        for stable, indices in STABLE_INDICES.items():
+            owner = state.owners[indices[0]]
+            if owner is not None and state.horses_owned[owner][stable] == len(indices) \
+                    and any(state.races[index] < 5 for index in indices):
+                return True
+        return False
+
+    @staticmethod
+    def compute_drifts(game: Game):
+        """
+        :return: tuple (expected changes of money in one round,
+                        variances of the changes) indexed by player ids
+        """
+        admissions, (fee, fee_square), crossing = expected_tables()
+        state = game.board_state
+        number_of_players = len(game.players)
+        # admissions paid to the owner in one turn of another player
+        means = [0.0] * number_of_players
+        squares = [0.0] * number_of_players
+        owners, races, trainers_owned, alive = \
+            state.owners, state.races, state.trainers_owned, game.alive
+        for index, is_horse, levels in admissions:
+            owner = owners[index]
+            if owner is not None and alive[owner]:
+                mean, square = levels[races[index] if is_horse else trainers_owned[owner] - 1]
+                means[owner] += mean
+                squares[owner] += square
+        total_mean, total_square = sum(means), sum(squares)
+        opponents = game.number_of_players_alive - 1
+        bonus = crossing * START_BONUS if game.bank_money > START_BONUS else 0
+
+        drifts = [0.0] * number_of_players
+        variances = [0.0] * number_of_players
+        for player in game.players_alive:
+            player_id = player.id
+            paid = total_mean - means[player_id] + fee
+            paid_square = total_square - squares[player_id] + fee_square
+            drifts[player_id] = opponents * means[player_id] - paid + bonus
+            variances[player_id] = opponents * (squares[player_id] - means[player_id] ** 2) \
+                + paid_square - paid ** 2
+        return drifts, variances
+
+
+def compare(strategies, number_of_games, seed=0, **options):
+    """
+    Play the same games (the same seeds) fully and with early resolution.
+    :param strategies: list of [strategy, name] of the players
+    :return: dict with the numbers of the outcomes, rounds and times of both
+    """
+    comparison = {"games": number_of_games, "same_rank": 0, "same_winner": 0,
+                  "resolved": 0, "ties": 0, "early_ties": 0, "false_ties": 0, "missed_ties": 0,
+                  "rounds": 0, "early_rounds": 0, "time": 0.0, "early_time": 0.0}
+    for game_index in range(number_of_games):
+        start = time.perf_counter()
+        game = Game([Player(name, strategy) for strategy, name in strategies], seed + game_index)
+        rank = game.play()
+        middle = time.perf_counter()
+        early_game = Game([Player(name, strategy) for strategy, name in strategies],
+                          seed + game_index, resolution=EarlyResolution(**options))
+        early_rank = early_game.play()
+        end = time.perf_counter()
+
+        comparison["time"] += middle - start
+        comparison["early_time"] += end - middle
+        comparison["rounds"] += game.round
+        comparison["early_rounds"] += early_game.round
+        comparison["resolved"] += early_game.resolved
+        comparison["same_rank"] += rank == early_rank
+        comparison["same_winner"] += bool(rank) and bool(early_rank) and rank[0] == early_rank[0]
+        comparison["ties"] += not rank
+        comparison["early_ties"] += not early_rank
+        comparison["false_ties"] += bool(rank) and not early_rank
+        comparison["missed_ties"] += not rank and bool(early_rank)
+    return comparison
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Compare games ended by early resolution with fully played games."
+    )
+    parser.add_argument("games", type=int, nargs="?", default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--interval", type=int, default=10)
+    parser.add_argument("--max-interval", type=int, default=80)
+    parser.add_argument("--horizon", type=int, default=60)
+    parser.add_argument("--z", type=float, default=4.0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    logger.set_sink(logger.NullSink())
+    strategies = [[ThresholdStrategy(2000), "Threshold2000"],
+                  [NoCheapHorsesStrategy(), "NoCheapHorses"],
+                  [ScoreStrategy(), "ScoreStrategy"]]
+    comparison = compare(strategies, arguments.games, arguments.seed, interval=arguments.interval,
+                         max_interval=arguments.max_interval,
+                         horizon=arguments.horizon, z=arguments.z)
+    games = comparison["games"]
+    print(f"{games} games of {', '.join(strategy[1] for strategy in strategies)}, "
+          f"{comparison['resolved']} resolved early")
+    print(f"Same rank: {100 * comparison['same_rank'] / games:.1f}%, "
+          f"same winner: {100 * comparison['same_winner'] / (games - comparison['ties']):.1f}% "
+          f"of the games with a winner")
+    print(f"Ties: {comparison['ties']} played fully, {comparison['early_ties']} resolved early "
+          f"({comparison['false_ties']} of them had a winner, "
+          f"{comparison['missed_ties']} ties got a winner)")
+    print(f"Rounds: {comparison['early_rounds']} instead of {comparison['rounds']} "
+          f"({100 * (1 - comparison['early_rounds'] / comparison['rounds']):.1f}% saved)")
+    print(f"Time: {comparison['early_time']:.2f} s instead of {comparison['time']:.2f} s "
+          f"({100 * (1 - comparison['early_time'] / comparison['time']):.1f}% saved)")
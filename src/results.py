@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import time
+
+
+class ResultsWriter:
+    """
+    A writer streaming results of a tournament to a file as the games are played.
+    The file is in JSON lines format: the first line describes the tournament,
+    every other line holds the results of one chunk of games of one combination.
+    Lines are only appended and the file is flushed at least every few seconds,
+    so an interrupted tournament loses only the last few chunks.
+    """
+
+    FLUSH_INTERVAL = 5  # seconds
+
+    def __init__(self, path, append=False):
+        self.file = open(path, "a" if append else "w", encoding="utf-8")
+        self.last_flush = time.monotonic()
+
+    def write_header(self, **info):
+        self.write_record({"type": "tournament", **info})
+
+    def write_chunk(self, combination_index, players, game_indices,
+                    wins, number_of_games_by_players, number_of_ties, ratings):
+        self.write_record({
+            "type": "chunk",
+            "combination": combination_index,
+            "players": players,
+            "games": [game_indices.start, game_indices.stop],
+            "wins": wins,
+            "non_tie_games": number_of_games_by_players,
+            "ties": number_of_ties,
+            "ratings": ratings,  # [mu, sigma] of the players after the chunk
+        })
+
+    def write_record(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if time.monotonic() - self.last_flush >= self.FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        self.file.close()
+
+
+class Results:
+    """
+    Aggregated results of a tournament rebuilt from its streamed records.
+    A chunk written more than once (e.g. by a resumed tournament) is counted only once.
+    """
+
+    def __init__(self):
+        self.info = {}
+        self.wins = {}
+        self.non_tie_games = {}
+        self.games = {}
+        self.number_of_ties = 0
+        self.number_of_games = 0
+        self.ratings = {}  # the latest [mu, sigma] of every strategy
+        self.combinations = set()
+        self.chunks = set()
+
+    def add_record(self, record):
+        if record["type"] == "tournament":
+            self.info = record
+            for name in record.get("strategies", []):
+                self.wins.setdefault(name, 0)
+                self.non_tie_games.setdefault(name, 0)
+                self.games.setdefault(name, 0)
+        elif record["type"] == "chunk":
+            key = (record["combination"], record["games"][0])
+            if key in self.chunks:
+                return
+            self.chunks.add(key)
+            self.combinations.add(record["combination"])
+            number_of_games = record["games"][1] - record["games"][0]
+            self.number_of_games += number_of_games
+            self.ratings.update(record.get("ratings", {}))
+            self.number_of_ties += record["ties"]
+            for name in record["players"]:
+                self.wins[name] = self.wins.get(name, 0) + record["wins"].get(name, 0)
+                self.non_tie_games[name] = \
+                    self.non_tie_games.get(name, 0) + record["non_tie_games"].get(name, 0)
+                self.games[name] = self.games.get(name, 0) + number_of_games
+
+    @property
+    def ranks(self):
+        """
+        :return: list of tuples (name, wins, non-tie games, games) sorted by wins
+        """
+        return sorted(
+            ((name, self.wins[name], self.non_tie_games[name], self.games[name])
+             for name in self.wins),
+            key=lambda rank: rank[1], reverse=True
+        )
+
+
+def read_results(path) -> Results:
+    results = Results()
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.endswith("\n"):  # the last line may be cut by a crash
+                results.add_record(json.loads(line))
+    return results
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Print results of a (running) tournament.")
+    parser.add_argument("path", nargs="?", default="../stats.jsonl",
+                        help="results file written by a tournament")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    results = read_results(arguments.path)
+    print(f"{results.number_of_games} games played in {len(results.combinations)} "
+          f"of {results.info.get('number_of_combinations', '?')} combinations, "
+          f"{results.number_of_ties} ties.")
+    for name, wins, non_tie_games, games in results.ranks:
+        percentage = 100 * wins // non_tie_games if non_tie_games else 0
+        print(f"{name}: {wins} ({percentage}%, {non_tie_games} non-tie games of {games})")
+    if results.ratings:
+        print("\nRatings (mu +- sigma):")
+        for name, (mu, sigma) in sorted(results.ratings.items(),
+                                        key=lambda item: item[1][0] - 3 * item[1][1], reverse=True):
+            print(f"{name}: {mu:.2f} +- {sigma:.2f}")
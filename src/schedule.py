@@ -0,0 +1,77 @@
+import itertools
+import math
+from collections import Counter
+from random import Random
+
+# schedules of tournaments: which combinations of players play
+ALL = "all"  # every combination
+DESIGN = "design"  # every strategy in the same number of combinations, pairs meet evenly
+RANDOM = "random"  # every strategy in the same number of combinations, random opponents
+SWISS = "swiss"  # rounds of combinations of strategies with similar scores
+SCHEDULES = [ALL, DESIGN, RANDOM, SWISS]
+
+
+def all_combinations(number_of_strategies, number_of_players):
+    return itertools.combinations(range(number_of_strategies), number_of_players)
+
+
+def block_design(number_of_strategies, number_of_players, appearances, rng: Random,
+                 balance_pairs=True):
+    """
+    Choose combinations of players (blocks) so that every strategy appears in
+    the given number of them (one more for some, if they can't be divided evenly).
+    The blocks are built one player at a time from the strategies with the fewest
+    appearances so far. With balance_pairs, the player who met the players
+    already in the block the fewest times is chosen, so every pair of strategies
+    meets about as often as in a balanced incomplete block design; otherwise
+    the opponents are random.
+    :return: list of tuples of indices of strategies
+    """
+    if number_of_players > number_of_strategies:
+        raise ValueError("There are fewer strategies than players of a game.")
+    number_of_blocks = math.ceil(number_of_strategies * appearances / number_of_players)
+    counts = [0] * number_of_strategies
+    meetings = Counter()  # (strategy, strategy) -> number of blocks they are both in
+    blocks = []
+    for _ in range(number_of_blocks):
+        block = []
+        for _ in range(number_of_players):
+            candidates = [strategy for strategy in range(number_of_strategies)
+                          if strategy not in block]
+            fewest = min(counts[strategy] for strategy in candidates)
+            candidates = [strategy for strategy in candidates if counts[strategy] == fewest]
+            if balance_pairs and block:
+                def meetings_with_block(strategy):
+                    return sum(meetings[min(strategy, other), max(strategy, other)]
+                               for other in block)
+                fewest = min(map(meetings_with_block, candidates))
+                candidates = [strategy for strategy in candidates
+                              if meetings_with_block(strategy) == fewest]
+            block.append(rng.choice(candidates))
+        for first, second in itertools.combinations(sorted(block), 2):
+            meetings[first, second] += 1
+        for strategy in block:
+            counts[strategy] += 1
+        blocks.append(tuple(sorted(block)))
+    return blocks
+
+
+def swiss_round(scores, number_of_players, rng: Random):
+    """
+    Group strategies with similar scores into combinations.
+    Strategies are ordered by their scores (ties randomly) and every
+    number_of_players consecutive ones play together; if the last group is not
+    full, it is filled with the strategies ranked just above it.
+    :param scores: list of scores of the strategies
+    :return: list of tuples of indices of strategies
+    """
+    order = list(range(len(scores)))
+    rng.shuffle(order)
+    order.sort(key=lambda strategy: scores[strategy], reverse=True)
+    blocks = []
+    for start in range(0, len(order), number_of_players):
+        block = order[start:start + number_of_players]
+        if len(block) < number_of_players:
+            block = order[-number_of_players:]
+        blocks.append(tuple(sorted(block)))
+    return blocks
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+import argparse
+
+import numpy as np
+
+from board import initialBoard, Property, Horse, STABLE_SIZES
+from dataset import Dataset
+
+NUMBER_OF_FIELDS = len(initialBoard)
+PROPERTY_INDICES = [field.index for field in initialBoard if isinstance(field, Property)]
+STABLES = np.array([field.stable if isinstance(field, Horse) else -1 for field in initialBoard])
+
+
+def snapshot_dtype(number_of_players):
+    """
+    :return: NumPy structured type of one snapshot of the state of a game,
+             players are indexed by their ids (seats)
+    """
+    return np.dtype([
+        ("combination", np.int32),
+        ("game", np.int32),
+        ("round", np.int16),
+        ("money", np.int32, (number_of_players,)),
+        ("bank_money", np.int32),
+        ("owners", np.int8, (NUMBER_OF_FIELDS,)),  # player ids, -1 for free fields
+        ("races", np.int8, (NUMBER_OF_FIELDS,)),
+    ])
+
+
+class Snapshots:
+    """
+    A ring buffer of the last snapshots of the state of a game
+    (money, owners and races) taken every few rounds.
+    The buffer is preallocated, so a snapshot costs only a few array assignments,
+    and it keeps only the last capacity snapshots however long the game is.
+    """
+
+    def __init__(self, number_of_players, interval=25, capacity=20):
+        """
+        :param interval: number of rounds between the snapshots
+        :param capacity: number of the last snapshots kept
+        """
+        self.interval = interval
+        self.capacity = capacity
+        self.number_of_snapshots = 0
+        self.buffer = np.zeros(capacity, snapshot_dtype(number_of_players))
+
+    def take(self, game):
+        snapshot = self.buffer[self.number_of_snapshots % self.capacity]
+        snapshot["round"] = game.round
+        snapshot["money"] = [player.money for player in game.players]
+        snapshot["bank_money"] = game.bank_money
+        owners = game.board_state.owners
+        snapshot["owners"] = [-1 if owner is None else owner for owner in owners]
+        snapshot["races"] = game.board_state.races
+        self.number_of_snapshots += 1
+
+    def to_array(self, combination_index, game_index):
+        """
+        :return: the kept snapshots from the oldest one (structured array of snapshot_dtype)
+        """
+        start = max(self.number_of_snapshots - self.capacity, 0)
+        snapshots = self.buffer[np.arange(start, self.number_of_snapshots) % self.capacity]
+        snapshots["combination"] = combination_index
+        snapshots["game"] = game_index
+        return snapshots
+
+
+def diagnose(snapshots):
+    """
+    Summarize the state of tied games at their last snapshots.
+    :param snapshots: structured array of snapshot_dtype, snapshots of every game in a row
+    :return: dict of averages over the games
+    """
+    combinations, games = snapshots["combination"], snapshots["game"]
+    starts = np.flatnonzero(np.r_[True, (combinations[1:] != combinations[:-1])
+                                  | (games[1:] != games[:-1])])
+    ends = np.r_[starts[1:], len(snapshots)] - 1
+    last, previous = snapshots[ends], snapshots[np.maximum(ends - 1, starts)]
+
+    owners = last["owners"]
+    whole_stables = np.zeros(len(last))
+    for stable in STABLE_SIZES:
+        stable_owners = owners[:, STABLES == stable]
+        whole_stables += (stable_owners >= 0).all(axis=1) \
+            & (stable_owners == stable_owners[:, :1]).all(axis=1)
+    alive = last["money"] >= 0
+    money = np.where(alive, last["money"], np.nan)
+    rounds = np.maximum(last["round"] - previous["round"], 1)
+    money_change = np.where(alive, last["money"] - previous["money"], np.nan) / rounds[:, None]
+    return {
+        "games": len(last),
+        "round": last["round"].mean(),
+        "players_alive": alive.sum(axis=1).mean(),
+        "free_properties": (owners[:, PROPERTY_INDICES] < 0).sum(axis=1).mean(),
+        "whole_stables": whole_stables.mean(),
+        "races": last["races"].sum(axis=1).mean(),
+        "bank_money": last["bank_money"].mean(),
+        "money_spread": (np.nanmax(money, axis=1) - np.nanmin(money, axis=1)).mean(),
+        "money_change": np.nanmean(np.abs(money_change)),
+    }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Diagnose tied games by their last snapshots.")
+    parser.add_argument("directory", nargs="?", default="../ties",
+                        help="snapshots of tied games written by a tournament")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    snapshots = Dataset(arguments.directory).load()
+    if len(snapshots) == 0:
+        print("There are no snapshots of tied games.")
+    else:
+        diagnosis = diagnose(snapshots)
+        print(f"{diagnosis['games']} tied games, "
+              f"at the last snapshot (round {diagnosis['round']:.0f} on average):")
+        print(f"  players alive: {diagnosis['players_alive']:.2f}")
+        print(f"  free properties: {diagnosis['free_properties']:.2f} of {len(PROPERTY_INDICES)}")
+        print(f"  stables owned by a single player: {diagnosis['whole_stables']:.2f} "
+              f"of {len(STABLE_SIZES)}")
+        print(f"  races bought: {diagnosis['races']:.1f}")
+        print(f"  money of the bank: {diagnosis['bank_money']:.0f}")
+        print(f"  difference between the richest and the poorest player: "
+              f"{diagnosis['money_spread']:.0f}")
+        print(f"  change of money of a player per round (since the previous snapshot): "
+              f"{diagnosis['money_change']:.0f}")
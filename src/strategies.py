@@ -1,8 +1,58 @@
 from abc import ABC, abstractmethod
-from board import Horse, Trainer, Property
+from bisect import bisect_right
+
+import numpy as np
+
+from board import initialBoard, Horse, Trainer, Property, STABLE_SIZES
+
+PROPERTY = "property"
+RACE = "race"
+
+IS_HORSE = np.array([isinstance(field, Horse) for field in initialBoard])
+FIELD_PRICES = np.array([field.price if isinstance(field, Property) else 0 for field in initialBoard])
+FIELD_STABLE_SIZES = np.array([STABLE_SIZES[field.stable] if isinstance(field, Horse) else 1
+                               for field in initialBoard])
+
+
+class DecisionRequests:
+    """
+    Decisions of the same kind a strategy has to make in many games at once,
+    one element of every array per decision, with the state of the game they depend on.
+    """
+
+    __slots__ = ("kind", "fields", "prices", "money", "round", "horses_of_stable", "trainers_owned")
+
+    def __init__(self, kind, fields, prices, money, round, horses_of_stable, trainers_owned):
+        """
+        :param kind: PROPERTY or RACE
+        :param fields: indices of the offered properties (horses for races)
+        :param prices: prices of the offers (new race prices for races)
+        :param money: money of the player
+        :param round: current round (the same in all the games)
+        :param horses_of_stable: horses of the stable of the offered horse the player owns
+                                 (meaningless for trainers)
+        :param trainers_owned: trainers the player owns
+        """
+        self.kind = kind
+        self.fields = fields
+        self.prices = prices
+        self.money = money
+        self.round = round
+        self.horses_of_stable = horses_of_stable
+        self.trainers_owned = trainers_owned
+
+    def __len__(self):
+        return len(self.fields)
 
 
 class Strategy(ABC):
+    @property
+    def parameters(self) -> dict:
+        """
+        :return: parameters of the strategy by their names (the arguments of its constructor)
+        """
+        return {}
+
     @abstractmethod
     def decide_whether_to_buy_property(self, controller,
                                        property: Property) -> bool:
@@ -13,6 +63,18 @@ class Strategy(ABC):
                                    horse: Horse) -> bool:
         pass
 
+    def decide_batch(self, requests: DecisionRequests):
+        """
+        Make many decisions at once, the same as the decide methods would make them.
+        Optional, strategies implementing it can be played by the batch engine.
+        :return: bool array, one decision for every request
+        """
+        raise NotImplementedError
+
+
+def can_decide_in_batches(strategy: Strategy) -> bool:
+    return type(strategy).decide_batch is not Strategy.decide_batch
+
 
 class ThresholdStrategy(Strategy):
     """
@@ -23,6 +85,10 @@ class ThresholdStrategy(Strategy):
     def __init__(self, threshold):
         self.threshold = threshold
 
+    @property
+    def parameters(self) -> dict:
+        return {"threshold": self.threshold}
+
     def decide_whether_to_buy_property(self, controller,
                                        property: Property) -> bool:
         return (controller.player_money - property.price) > self.threshold
@@ -31,6 +97,9 @@ class ThresholdStrategy(Strategy):
                                    horse: Horse) -> bool:
         return (controller.player_money - horse.new_race_price) > self.threshold
 
+    def decide_batch(self, requests: DecisionRequests):
+        return (requests.money - requests.prices) > self.threshold
+
 
 class NoCheapHorsesStrategy(Strategy):
     """
@@ -50,141 +119,184 @@ class NoCheapHorsesStrategy(Strategy):
                                    horse: Horse) -> bool:
         return True
 
+    def decide_batch(self, requests: DecisionRequests):
+        if requests.kind == RACE:
+            return np.ones(len(requests), bool)
+        fields = requests.fields
+        return ~(IS_HORSE[fields] & (fields < 3) & (requests.round <= 10)) \
+            & (requests.money > 2000)
+
+
+class ScoreTable:
+    """
+    Scores of a quantity: the score of a value is the one of the highest threshold
+    not above the value. Thresholds are kept sorted, so a lookup is a binary search.
+    """
+
+    def __init__(self, scores):
+        """
+        :param scores: dict threshold -> score
+        """
+        self.thresholds = sorted(scores)
+        self.scores = [scores[threshold] for threshold in self.thresholds]
+        self.threshold_array = np.array(self.thresholds)
+        self.score_array = np.array(self.scores, float)
+
+    def score(self, value):
+        return self.scores[max(bisect_right(self.thresholds, value) - 1, 0)]
+
+    def score_all(self, values):
+        """
+        :return: array of the scores of an array of values
+        """
+        return self.score_array[
+            np.maximum(np.searchsorted(self.threshold_array, values, side="right") - 1, 0)
+        ]
+
 
 class ScoreStrategy(Strategy):
     """
     This strategy assigns a score to every property that is offered to it.
     The score is computed by a set of rules, depending on how the property
     meets them. If the score is positive, the property is bought.
+
+    Rules depending only on the property (efficiency of horses) are scored
+    once per property and remembered, only rules depending on the state
+    of the game are evaluated on every decision.
     """
 
+    MONEY_SCORES = ScoreTable({
+        100000: 10,
+        50000: 7,
+        30000: 6,
+        25000: 5,
+        20000: 4,
+        10000: 3,
+        5000: 2,
+        3000: 0,
+        2000: -1,
+        1000: -3,
+        0: -5
+    })
+    HORSE_EFFICIENCY_SCORES = ScoreTable({
+        .125: 3,
+        .1: 2.5,
+        .08: 1,
+        .07: .5,
+        .05: 0,
+        .03: -1,
+        0: -3
+    })
+    RACE_EFFICIENCY_SCORES = ScoreTable({
+        2.4: 5,
+        2.2: 4,
+        2: 3,
+        1.8: 2,
+        1.6: 1,
+        1.4: 0,
+        1: -2,
+        0: -3
+    })
+    STABLE_OWNED_SCORES = ScoreTable({
+        1: 5,
+        2 / 3: 4,
+        1 / 2: 3,
+        1 / 3: 1,
+        0: -1
+    })
+    TRAINERS_OWNED_SCORES = ScoreTable({
+        3: 5,
+        2: 3,
+        1: 0,
+        0: -1
+    })
+    TRAINER_SCORE = 2
+
+    # fields are shared by all games, so their scores are shared by all instances
+    property_scores = {}
+    race_scores = {}
+    field_scores = None  # arrays (property scores, race scores) by field indices
+
     def decide_whether_to_buy_property(self, controller,
                                        property: Property) -> bool:
-        score = 0
-        player_name = controller.player_name
-
-        remaining_money = controller.player_money - property.price
-        money_scores = {
-            100000: 10,
-            50000: 7,
-            30000: 6,
-            25000: 5,
-            20000: 4,
-            10000: 3,
-            5000: 2,
-            3000: 0,
-            2000: -1,
-            1000: -3,
-            0: -5
-        }
-        score += self.__determine_score(money_scores, remaining_money)
+        score = self.MONEY_SCORES.score(controller.player_money - property.price)
 
         if isinstance(property, Horse):
-            horse_efficiency = property.admissions[0] / property.price
-            horse_efficiency_scores = {
-                .125: 3,
-                .1: 2.5,
-                .08: 1,
-                .07: .5,
-                .05: 0,
-                .03: -1,
-                0: -3
-            }
-            score += self.__determine_score(horse_efficiency_scores, horse_efficiency)
-
-            main_race_efficiency = property.admissions[5] / 5 / property.new_race_price
-            race_efficiency_scores = {
-                2.4: 5,
-                2.2: 4,
-                2: 3,
-                1.8: 2,
-                1.6: 1,
-                1.4: 0,
-                1: -2,
-                0: -3
-            }
-            score += self.__determine_score(
-                race_efficiency_scores,
-                main_race_efficiency
-            )
+            score += self.property_score(property)
 
             stable = property.stable
             stable_owned = \
-                controller.number_of_horses_of_stable_owned_by_player(player_name, stable) \
+                controller.number_of_horses_of_stable_owned_by_player(stable, controller.player_id) \
                 / controller.number_of_horses_of_stable(stable)
-            stable_owned_scores = {
-                1: 5,
-                2 / 3: 4,
-                1 / 2: 3,
-                1 / 3: 1,
-                0: -1
-            }
-            score += self.__determine_score(
-                stable_owned_scores,
-                stable_owned
-            )
+            score += self.STABLE_OWNED_SCORES.score(stable_owned)
 
         elif isinstance(property, Trainer):
-            score += 2
-
-            trainers_owned = \
-                controller.number_of_trainers_already_owned_by_player(player_name)
-            trainers_owned_scores = {
-                3: 5,
-                2: 3,
-                1: 0,
-                0: -1
-            }
-            score += self.__determine_score(
-                trainers_owned_scores,
-                trainers_owned
+            score += self.TRAINER_SCORE
+            score += self.TRAINERS_OWNED_SCORES.score(
+                controller.number_of_trainers_already_owned_by_player(controller.player_id)
             )
 
         return score > 0
 
     def decide_whether_to_buy_race(self, controller,
                                    horse: Horse) -> bool:
-        score = 0
-        remaining_money = controller.player_money - horse.price
-
-        money_scores = {
-            100000: 10,
-            50000: 7,
-            30000: 6,
-            25000: 5,
-            20000: 4,
-            10000: 3,
-            5000: 2,
-            3000: 0,
-            2000: -1,
-            1000: -3,
-            0: -5
-        }
-        score += self.__determine_score(money_scores, remaining_money)
-
-        main_race_efficiency = horse.admissions[5] / 5 / horse.new_race_price
-        race_efficiency_scores = {
-            2.4: 5,
-            2.2: 4,
-            2: 3,
-            1.8: 2,
-            1.6: 1,
-            1.4: 0,
-            1: -2,
-            0: -3
-        }
-        score += self.__determine_score(
-            race_efficiency_scores,
-            main_race_efficiency
+        score = self.MONEY_SCORES.score(controller.player_money - horse.price)
+        score += self.race_score(horse)
+        return score > 0
+
+    def decide_batch(self, requests: DecisionRequests):
+        property_scores, race_scores = self.compute_field_scores()
+        fields = requests.fields
+        if requests.kind == RACE:
+            scores = self.MONEY_SCORES.score_all(requests.money - FIELD_PRICES[fields])
+            return scores + race_scores[fields] > 0
+
+        scores = self.MONEY_SCORES.score_all(requests.money - requests.prices)
+        horses = IS_HORSE[fields]
+        scores += np.where(horses, property_scores[fields], self.TRAINER_SCORE)
+        scores += np.where(
+            horses,
+            self.STABLE_OWNED_SCORES.score_all(requests.horses_of_stable / FIELD_STABLE_SIZES[fields]),
+            self.TRAINERS_OWNED_SCORES.score_all(requests.trainers_owned)
         )
+        return scores > 0
 
-        return score > 0
+    def compute_field_scores(self):
+        """
+        :return: tuple of arrays (property_score, race_score) of the horses by field indices
+        """
+        if ScoreStrategy.field_scores is None:
+            horses = [field for field in initialBoard if isinstance(field, Horse)]
+            property_scores = np.zeros(len(initialBoard))
+            race_scores = np.zeros(len(initialBoard))
+            for horse in horses:
+                property_scores[horse.index] = self.property_score(horse)
+                race_scores[horse.index] = self.race_score(horse)
+            ScoreStrategy.field_scores = property_scores, race_scores
+        return ScoreStrategy.field_scores
 
-    @staticmethod
-    def __determine_score(thresholds, actual):
-        for threshold, delta_score in thresholds.items():
-            if threshold <= actual:
-                return delta_score
+    def property_score(self, horse: Horse):
+        """
+        :return: the part of the score of buying the horse which depends only on the horse
+        """
+        score = self.property_scores.get(horse)
+        if score is None:
+            score = self.HORSE_EFFICIENCY_SCORES.score(horse.admissions[0] / horse.price) \
+                    + self.race_score(horse)
+            self.property_scores[horse] = score
+        return score
+
+    def race_score(self, horse: Horse):
+        """
+        :return: the part of the score of buying a race which depends only on the horse
+        """
+        score = self.race_scores.get(horse)
+        if score is None:
+            score = self.RACE_EFFICIENCY_SCORES.score(
+                horse.admissions[5] / 5 / horse.new_race_price
+            )
+            self.race_scores[horse] = score
+        return score
 
 
 class HumanStrategy(Strategy):
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+import argparse
+import itertools
+import random
+
+import numpy as np
+
+from tournament import Tournament, STRATEGIES, derive_seed
+import strategies
+
+
+class Sweep:
+    """
+    A search for the best parameters of a strategy.
+    Every stage is a tournament of the strategy with every combination of parameters
+    of a grid (and optionally of other strategies as opponents). The next stage
+    refines the grid around the parameters that won the most games,
+    so the search goes from a coarse grid to a fine one.
+    """
+
+    def __init__(self, strategy_class, grid, stages=3, set_length=100, number_of_players=3,
+                 opponents=(), seed=None, workers=1, engine="reference"):
+        """
+        :param strategy_class: class of the strategy, parameters are arguments of its constructor
+        :param grid: dict parameter name -> list of values of the first stage
+        :param stages: maximum number of stages
+        :param set_length: number of games of every combination of players in a stage
+        :param opponents: other strategies playing in every stage ([strategy, name] lists)
+        :param engine: game engine of the tournaments (see Tournament), chunks of a stage
+                       hold only set_length games, too few for the batch engine to be faster
+        """
+        self.strategy_class = strategy_class
+        self.grid = {name: sorted(set(values)) for name, values in grid.items()}
+        self.stages = stages
+        self.set_length = set_length
+        self.number_of_players = number_of_players
+        self.opponents = list(opponents)
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.workers = workers
+        self.engine = engine
+        self.results = []  # dicts with the stage, parameters and results of every entrant
+
+    def run(self):
+        grid = self.grid
+        for stage in range(self.stages):
+            best = self.play_stage(stage, grid)
+            refined_grid = self.refine(grid, best)
+            if refined_grid == grid:
+                break  # the grid can't get any finer
+            grid = refined_grid
+        return self.best
+
+    def create_entrants(self, grid):
+        """
+        :return: list of [strategy, name] of every combination of the parameters of the grid
+        """
+        entrants = []
+        for values in itertools.product(*grid.values()):
+            parameters = dict(zip(grid, values))
+            name = f"{self.strategy_class.__name__}(" \
+                   + ", ".join(f"{key}={value}" for key, value in parameters.items()) + ")"
+            entrants.append([self.strategy_class(**parameters), name])
+        return entrants
+
+    def play_stage(self, stage, grid):
+        """
+        Play a tournament of the entrants of the grid.
+        :return: parameters of the entrant with the highest ratio of won games
+        """
+        entrants = self.create_entrants(grid)
+        tournament = Tournament(
+            self.number_of_players, self.set_length, entrants + self.opponents,
+            workers=self.workers, seed=derive_seed(self.seed, stage), engine=self.engine,
+            results_file=None, checkpoint_file=None, dataset_directory=None,
+            matrices_file=None
+        )
+        tournament.play()
+
+        print(f"Stage {stage + 1}: {len(entrants)} entrants, "
+              f"{tournament.total_number_of_games} games")
+        best, best_win_rate = None, -1
+        for strategy, name in entrants:
+            wins = tournament.wins[name]
+            non_tie_games = tournament.number_of_games_by_players[name]
+            win_rate = wins / non_tie_games if non_tie_games else 0
+            self.results.append({
+                "stage": stage,
+                **strategy.parameters,
+                "wins": wins,
+                "non_tie_games": non_tie_games,
+                "games": tournament.number_of_games_of_one_player,
+                "win_rate": win_rate,
+            })
+            print(f"  {name}: {100 * win_rate:.1f}% ({wins} of {non_tie_games} non-tie games)")
+            if win_rate > best_win_rate:
+                best, best_win_rate = strategy.parameters, win_rate
+        return best
+
+    @staticmethod
+    def refine(grid, best):
+        """
+        :return: a grid with the same number of values of every parameter between the values
+                 neighbouring the best one; parameters that aren't numbers keep the best value
+        """
+        refined_grid = {}
+        for name, values in grid.items():
+            value = best[name]
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                refined_grid[name] = [value]
+                continue
+            index = values.index(value)
+            low = values[max(index - 1, 0)]
+            high = values[min(index + 1, len(values) - 1)]
+            refined = np.linspace(low, high, len(values))
+            if isinstance(value, int):
+                refined = np.round(refined).astype(np.int64)
+            refined_grid[name] = sorted(set(refined.tolist()))
+        return refined_grid
+
+    @property
+    def best(self):
+        """
+        :return: the results of the entrant of the last stage with the highest ratio of won games
+        """
+        last_stage = self.results[-1]["stage"]
+        return max((result for result in self.results if result["stage"] == last_stage),
+                   key=lambda result: result["win_rate"])
+
+    def to_array(self):
+        """
+        :return: the results as a NumPy structured array, parameters are typed columns
+        """
+        columns = list(self.results[0])
+        return np.rec.fromarrays(
+            [np.array([result[column] for result in self.results]) for column in columns],
+            names=columns
+        )
+
+    def save(self, path):
+        np.savez(path, results=self.to_array())
+
+
+def parse_values(text):
+    """
+    Parse values of a parameter: either a list ("0,500,1000")
+    or a range of a given number of values ("0:20000:11").
+    """
+    def parse_number(number):
+        try:
+            return int(number)
+        except ValueError:
+            return float(number)
+
+    if ":" in text:
+        start, stop, number = text.split(":")
+        start, stop = parse_number(start), parse_number(stop)
+        values = np.linspace(start, stop, int(number))
+        if isinstance(start, int) and isinstance(stop, int):
+            values = np.round(values).astype(np.int64)
+        return values.tolist()
+    return [parse_number(value) for value in text.split(",")]
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Search for the best parameters of a strategy.")
+    parser.add_argument("grid", nargs="+",
+                        help="values of parameters, e.g. threshold=0:20000:11 or threshold=0,500")
+    parser.add_argument("--strategy", default="ThresholdStrategy",
+                        help="class of the strategy (from strategies.py)")
+    parser.add_argument("--stages", type=int, default=3, help="maximum number of stages")
+    parser.add_argument("--set-length", type=int, default=100,
+                        help="number of games of every combination of players")
+    parser.add_argument("--with-opponents", action="store_true",
+                        help="let the other strategies of the tournament play too")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help="save the results to this file (.npz)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    strategy_class = getattr(strategies, arguments.strategy)
+    grid = {}
+    for parameter in arguments.grid:
+        name, values = parameter.split("=")
+        grid[name] = parse_values(values)
+    opponents = [strategy for strategy in STRATEGIES if not isinstance(strategy[0], strategy_class)] \
+        if arguments.with_opponents else []
+    sweep = Sweep(strategy_class, grid, arguments.stages, arguments.set_length,
+                  opponents=opponents, seed=arguments.seed, workers=arguments.workers)
+    best = sweep.run()
+    print("Best: " + ", ".join(f"{name}={best[name]}" for name in grid)
+          + f" ({100 * best['win_rate']:.1f}% of non-tie games won)")
+    if arguments.output is not None:
+        sweep.save(arguments.output)
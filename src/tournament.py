@@ -1,22 +1,339 @@
 #!/usr/bin/env python3
-from game import Game
+from batch import BatchSimulator, is_batch_expressible
+from dataset import DatasetWriter, game_dtype, MAX_ROUNDS_STORED
+from game import Game, MAX_ROUNDS
+from matrices import Matrices
 from player import Player
+from profiler import Profiler
+from rating import RatingSystem
+from replay import TraceRecorder, TraceWriter
+from resolution import EarlyResolution
+from results import ResultsWriter
+from snapshots import Snapshots, snapshot_dtype
+from schedule import ALL, DESIGN, RANDOM, SWISS, SCHEDULES, all_combinations, block_design, \
+    swiss_round
 from strategies import ThresholdStrategy, NoCheapHorsesStrategy, ScoreStrategy
-import itertools
+from multiprocessing import Pool
+from multiprocessing.util import Finalize
+import argparse
+import hashlib
+import json
 import logger
 import math
+import numpy as np
+import os
+import random
+import statistics
+import time
+
+
+def derive_seed(seed, *indices):
+    """
+    Derive a child seed from the tournament seed and the given indices
+    (e.g. a combination index and a game index).
+    The derived seed doesn't depend on the order in which games are played,
+    so the results are the same for any number of workers.
+    """
+    key = ":".join(str(part) for part in (seed, *indices)).encode()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+
+def install_log_sink(log_file=None, log_level=logger.EVENT):
+    """
+    Discard all log messages, unless a file for structured logs is given.
+    """
+    if log_file is None:
+        logger.set_sink(logger.NullSink())
+    else:
+        logger.set_sink(logger.FileSink(log_file, log_level))
+
+
+def install_worker_log_sink(log_file=None, log_level=logger.EVENT):
+    """
+    Install the log sink of a worker process, which closes it when it exits.
+    """
+    install_log_sink(log_file, log_level)
+    Finalize(None, logger.set_sink, args=(logger.NullSink(),), exitpriority=10)
+
+
+class Settings:
+    """
+    Settings of a tournament needed for playing its games.
+    They are sent to worker processes along with every chunk of games.
+    With paired seeds, the n-th game of every combination gets the same seed
+    (common random numbers), which reduces the variance of comparisons
+    between strategies.
+    """
+
+    def __init__(self, seed, paired=False, engine="reference", profile=False, trace=False,
+                 dataset=False, early_resolution=False, max_rounds=MAX_ROUNDS,
+                 snapshot_interval=None, snapshot_capacity=20):
+        self.seed = seed
+        self.paired = paired
+        self.engine = engine
+        self.profile = profile
+        self.trace = trace
+        self.dataset = dataset
+        self.early_resolution = early_resolution
+        self.max_rounds = max_rounds
+        self.snapshot_interval = snapshot_interval  # None for no snapshots
+        self.snapshot_capacity = snapshot_capacity
+
+    def game_seed(self, combination_index, game_index):
+        if self.paired:
+            return derive_seed(self.seed, game_index)
+        return derive_seed(self.seed, combination_index, game_index)
+
+
+class ChunkResult:
+    """
+    Results of one chunk of games.
+    Chunks are played in worker processes, so they return partial results
+    which are merged into the tournament by the parent process.
+    """
+
+    def __init__(self):
+        self.wins = {}
+        self.number_of_games_by_players = {}
+        self.number_of_ties = 0
+        self.profiler = None
+        self.traces = []  # encoded traces of the games
+        self.games = None  # outcomes of the games (structured array of game_dtype)
+        # places of the players of every game in the order of the combination,
+        # in a tie the players who didn't go bankrupt share the first place
+        self.places = []
+        self.snapshots = None  # snapshots of the tied games (structured array of snapshot_dtype)
+        self.matrices = None  # head-to-head and seat counts of the combination (Matrices)
+
+
+def play_chunk(chunk):
+    """
+    Play one chunk of games of a single combination.
+    :param chunk: tuple (settings, combination index, combination, range of game indices)
+    :return: ChunkResult
+    """
+    settings, combination_index, combination, game_indices = chunk
+    if settings.engine == "batch":
+        return play_batch_chunk(chunk)
+    result = ChunkResult()
+    if settings.profile:
+        result.profiler = Profiler()
+    wins = result.wins
+    number_of_games_by_players = result.number_of_games_by_players
+    games = []
+    all_seats = []
+    tie_snapshots = []
+    for game_index in game_indices:
+        logger.set_context(combination=combination_index, game=game_index)
+        players = [Player(player[1], player[0]) for player in combination]
+        recorder = TraceRecorder(combination=combination_index, game=game_index) \
+            if settings.trace else None
+        resolution = EarlyResolution() if settings.early_resolution else None
+        snapshots = Snapshots(len(players), settings.snapshot_interval, settings.snapshot_capacity) \
+            if settings.snapshot_interval else None
+        game = Game(list(players), settings.game_seed(combination_index, game_index),
+                    result.profiler, recorder, resolution, settings.max_rounds, snapshots)
+        seats = [player.id for player in players]
+        all_seats.append(seats)
+        rank = game.play()
+        survivors = len(players) - len(game.rank)
+        result.places.append([survivors + game.rank.index(player.name) + 1
+                              if player.name in game.rank else 1 for player in players])
+        if recorder is not None:
+            result.traces.append(recorder.encode())
+        if settings.dataset:
+            games.append((combination_index, game_index, game.round, 0, seats, result.places[-1],
+                          [player.money for player in players]))
+        if rank:
+            wins[rank[0]] = wins.get(rank[0], 0) + 1
+            for player in rank:
+                number_of_games_by_players[player] = \
+                    number_of_games_by_players.get(player, 0) + 1
+        else:
+            result.number_of_ties += 1
+            if snapshots is not None:
+                tie_snapshots.append(snapshots.to_array(combination_index, game_index))
+    result.places = np.array(result.places, np.int8)
+    result.matrices = Matrices(len(combination), len(combination))
+    result.matrices.add_games(result.places, np.array(all_seats, np.int8))
+    if settings.dataset:
+        result.games = np.array(games, game_dtype(len(combination)))
+    if settings.snapshot_interval:
+        result.snapshots = np.concatenate(tie_snapshots) if tie_snapshots \
+            else np.empty(0, snapshot_dtype(len(combination)))
+    return result
+
+
+def play_batch_chunk(chunk):
+    """
+    Play one chunk of games at once with BatchSimulator.
+    The chunk is seeded by the index of its first game.
+    """
+    settings, combination_index, combination, game_indices = chunk
+    rng = np.random.default_rng(settings.game_seed(combination_index, game_indices.start))
+    simulator = BatchSimulator([player[0] for player in combination], rng, settings.max_rounds)
+    rank, rounds = simulator.play(len(game_indices))
+    names = [player[1] for player in combination]
+    decided = rank[:, 0] >= 0
+    number_of_decided_games = int(np.count_nonzero(decided))
+    result = ChunkResult()
+    result.wins = dict(zip(names, np.bincount(rank[decided, 0], minlength=len(names)).tolist()))
+    result.number_of_games_by_players = {name: number_of_decided_games for name in names}
+    result.number_of_ties = len(game_indices) - number_of_decided_games
+    result.places = batch_places(simulator)
+    result.matrices = Matrices(len(combination), len(combination))
+    result.matrices.add_games(result.places, batch_seats(simulator))
+    if settings.dataset:
+        result.games = batch_games(chunk, simulator, rounds, result.places)
+    return result
+
+
+def batch_places(simulator):
+    """
+    :return: array (games x players) of places of the players of the combination in the games
+             played by BatchSimulator, players who didn't go bankrupt share the first place
+    """
+    number_of_games, number_of_players = simulator.seating.shape
+    places_by_seat = np.ones((number_of_games, number_of_players), np.int8)
+    for order in range(number_of_players):
+        seats = simulator.elimination_order[:, order]
+        games = np.nonzero(seats >= 0)[0]
+        places_by_seat[games, seats[games]] = number_of_players - order
+    places = np.empty_like(places_by_seat)
+    np.put_along_axis(places, simulator.seating, places_by_seat, axis=1)
+    return places
+
+
+def batch_seats(simulator):
+    """
+    :return: array (games x players) of seats of the players of the combination
+             in the games played by BatchSimulator
+    """
+    seats = np.empty_like(simulator.seating)
+    seat_numbers = np.broadcast_to(np.arange(seats.shape[1]), seats.shape)
+    np.put_along_axis(seats, simulator.seating, seat_numbers, axis=1)
+    return seats
+
+
+def batch_games(chunk, simulator, rounds, places):
+    """
+    :param places: places of the players in the games (from batch_places)
+    :return: outcomes of the games played by BatchSimulator (structured array of game_dtype)
+    """
+    settings, combination_index, combination, game_indices = chunk
+    number_of_games, number_of_players = places.shape
+    games = np.zeros(number_of_games, game_dtype(number_of_players))
+    games["combination"] = combination_index
+    games["game"] = game_indices
+    games["rounds"] = rounds
+    games["seats"] = batch_seats(simulator)
+    np.put_along_axis(games["money"], simulator.seating, simulator.money, axis=1)
+    games["places"] = places
+    return games
 
 
 class Tournament:
     """
     A tournament runner.
-    It runs a game for every possible combination of players and writes
-    the results to file ('./stats.txt').
+    By default, it runs games of every possible combination of players; as their
+    number grows fast with the number of strategies, the combinations can instead
+    be chosen so that every strategy plays in a given number of them
+    (schedules "design" and "random"). It streams results
+    of every chunk of games to a file ('../stats.jsonl') as they are played
+    and writes the final results to file ('../stats.txt').
+    Games can be spread over several worker processes, the results for
+    a given seed are the same for any number of workers.
+    Tournaments of strategies which can make their decisions in batches
+    (Strategy.decide_batch) can be played by the batch engine (BatchSimulator),
+    which plays a whole chunk of games at once.
+    The progress (the number of finished chunks and the counters) is saved
+    to a checkpoint file periodically and when the tournament is interrupted,
+    so the tournament can be resumed later.
     """
-    def __init__(self, number_of_players, set_length, strategies):
+
+    CHUNK_SIZE = 50
+    BATCH_CHUNK_SIZE = 1000
+    # games in a chunk above which the batch engine is faster than the reference one
+    # (a chunk holds games of one combination, so at most set_length games)
+    BATCH_BREAK_EVEN = 500
+    CHECKPOINT_INTERVAL = 60  # seconds
+
+    def __init__(self, number_of_players, set_length, strategies, workers=1, seed=None,
+                 paired=False, log_file=None, log_level=logger.EVENT, engine="reference",
+                 results_file="../stats.jsonl", checkpoint_file="../checkpoint.json",
+                 resume=False, profile=False, profile_file=None, trace_file=None,
+                 early_resolution=False, max_rounds=MAX_ROUNDS, snapshot_interval=None,
+                 snapshot_capacity=20, ties_directory="../ties",
+                 dataset_directory="../games", matrices_file="../matrices.npz", schedule=ALL,
+                 appearances=None):
+        """
+        :param engine: "reference" (Game), "batch" (BatchSimulator)
+                       or "auto" (batch if all the strategies can decide in batches,
+                       chunks are large enough for it to be faster (BATCH_BREAK_EVEN)
+                       and no option of the reference engine only is requested)
+        :param results_file: file the results are streamed to (None for no file)
+        :param checkpoint_file: file the progress is saved to (None for no checkpoints)
+        :param resume: continue the tournament from the checkpoint file
+        :param profile: measure time spent in the phases of games (reference engine only)
+        :param profile_file: file the measured times are written to (JSON)
+        :param trace_file: file the traces of all games are written to (reference engine only)
+        :param early_resolution: end games whose outcome is almost certain early
+                                 (reference engine only, see EarlyResolution)
+        :param max_rounds: number of rounds after which a game is a tie
+                           (at most MAX_ROUNDS_STORED, the rounds are stored as int16)
+        :param snapshot_interval: number of rounds between snapshots of the state of games
+                                  (None for no snapshots, reference engine only)
+        :param snapshot_capacity: number of the last snapshots kept for every game
+        :param ties_directory: directory the snapshots of the tied games are written to
+        :param dataset_directory: directory the outcomes of all games are written to
+                                  (None for no dataset)
+        :param matrices_file: file the head-to-head and seat matrices are written to (.npz)
+        :param schedule: "all" (every combination of players), "design" (every strategy
+                         in the same number of combinations, pairs of strategies meeting
+                         evenly) or "random" (the same with random opponents)
+        :param appearances: number of combinations of every strategy (not for "all")
+        """
         self.number_of_players = number_of_players
         self.set_length = set_length
         self.strategies = strategies
+        self.workers = workers
+        self.checkpoint_file = checkpoint_file
+        self.resume = resume
+        checkpoint = self.read_checkpoint() if resume else None
+        if checkpoint is not None:
+            seed = checkpoint["tournament"]["seed"]
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.paired = paired
+        self.schedule = schedule
+        self.appearances = appearances
+        reference_options = [option for option, requested in (
+            ("profile", profile), ("trace_file", trace_file is not None),
+            ("early_resolution", early_resolution), ("snapshot_interval", snapshot_interval)
+        ) if requested]
+        self.engine = self.choose_engine(engine, reference_options)
+        self.early_resolution = early_resolution
+        if not 0 < max_rounds <= MAX_ROUNDS_STORED:
+            raise ValueError(f"The number of rounds must be between 1 and {MAX_ROUNDS_STORED}.")
+        self.max_rounds = max_rounds
+        self.settings = Settings(self.seed, self.paired, self.engine, profile,
+                                 trace_file is not None, dataset_directory is not None,
+                                 early_resolution, max_rounds, snapshot_interval, snapshot_capacity)
+        self.profiler = Profiler() if profile else None
+        self.profile_file = profile_file
+        self.log_file = log_file
+        self.log_level = log_level
+        self.results_file = results_file
+        self.results_writer = None
+        self.trace_file = trace_file
+        self.trace_writer = None
+        self.dataset_directory = dataset_directory
+        self.dataset_writer = None
+        self.matrices_file = matrices_file
+        self.ties_directory = ties_directory if snapshot_interval else None
+        self.ties_writer = None
+        self.completed_chunks = 0
+        self.checkpoint = None
+        self.last_checkpoint_time = time.monotonic()
 
         self.combinations = self.compute_combinations()
         self.number_of_combinations = self.compute_number_of_combinations()
@@ -24,42 +341,261 @@ class Tournament:
         self.number_of_games_of_one_player = self.compute_number_of_games_of_one_player()
         self.number_of_ties = 0
 
+        self.strategy_indices = {strategy[1]: index for index, strategy in enumerate(self.strategies)}
+        self.ratings = RatingSystem(strategy[1] for strategy in self.strategies)
+        self.matrices = Matrices(len(self.strategies), self.number_of_players)
         self.number_of_games_by_players = {}
         self.wins = {}
         for strategy in self.strategies:
             self.number_of_games_by_players[strategy[1]] = 0
             self.wins[strategy[1]] = 0
 
-        logger.enabled = False
+        if checkpoint is not None:
+            self.restore_checkpoint(checkpoint)
+
+        install_log_sink(self.log_file, self.log_level)
 
     def start(self):
         self.print_info()
         self.play()
         self.print_results()
         self.write_results_to_file()
+        if self.profiler is not None:
+            self.profiler.print_report()
+            if self.profile_file is not None:
+                self.profiler.write_json(self.profile_file)
 
     def play(self):
-        for combination in self.combinations:
-            for i in range(self.set_length):
-                players = [Player(player[1], player[0]) for player in combination]
-                game = Game(players)
-                rank = game.play()
-                if rank:
-                    self.wins[rank[0]] += 1
-                    for player in rank:
-                        self.number_of_games_by_players[player] += 1
-                else:
-                    self.number_of_ties += 1
+        if not self.resume:
+            self.remove_checkpoint()  # it belongs to the results this run overwrites
+        self.open_results_writer()
+        # traces and parts written after the checkpoint hold games which will be played again
+        checkpoint = self.checkpoint if self.resume and self.checkpoint is not None else {}
+        if self.trace_file is not None:
+            self.trace_writer = TraceWriter(self.trace_file, append=self.resume,
+                                            offset=checkpoint.get("trace_offset"))
+        if self.dataset_directory is not None:
+            self.dataset_writer = DatasetWriter(
+                self.dataset_directory, [strategy[1] for strategy in self.strategies],
+                self.number_of_players, append=self.resume, parts=checkpoint.get("dataset_parts")
+            )
+        if self.ties_directory is not None:
+            self.ties_writer = DatasetWriter(
+                self.ties_directory, [strategy[1] for strategy in self.strategies],
+                self.number_of_players, append=self.resume, parts=checkpoint.get("ties_parts")
+            )
+        try:
+            if self.workers > 1:
+                with Pool(self.workers, initializer=install_worker_log_sink,
+                          initargs=(self.log_file, self.log_level)) as pool:
+                    self.play_chunks(pool.imap)
+                    pool.close()
+                    pool.join()  # let the workers exit (and close their logs) normally
+            else:
+                self.play_chunks(map)
+        finally:
+            logger.set_sink(logger.NullSink())  # closes the log file
+            if self.results_writer is not None:
+                self.results_writer.close()
+            if self.trace_writer is not None:
+                self.trace_writer.close()
+            if self.dataset_writer is not None:
+                self.dataset_writer.close()
+            if self.ties_writer is not None:
+                self.ties_writer.close()
+            if self.matrices_file is not None:
+                self.matrices.save(self.matrices_file, [strategy[1] for strategy in self.strategies])
+            self.write_checkpoint()
+
+    def play_chunks(self, map_chunks):
+        """
+        Play all the chunks that haven't been played yet.
+        :param map_chunks: map function playing the chunks (lazily and in order)
+        """
+        chunks = list(self.compute_chunks())[self.completed_chunks:]
+        for chunk, result in zip(chunks, map_chunks(play_chunk, chunks)):
+            self.merge_results(chunk, result)
+
+    def choose_engine(self, engine, reference_options=()):
+        """
+        :param reference_options: names of the requested options supported
+                                  only by the reference engine
+        """
+        expressible = is_batch_expressible(strategy[0] for strategy in self.strategies)
+        if engine == "auto":
+            large_chunks = min(self.set_length, self.BATCH_CHUNK_SIZE) >= self.BATCH_BREAK_EVEN
+            return "batch" if expressible and large_chunks and not reference_options \
+                else "reference"
+        if engine == "batch":
+            if not expressible:
+                raise ValueError("The batch engine can play only strategies implementing decide_batch.")
+            if reference_options:
+                raise ValueError(f"The batch engine doesn't support {', '.join(reference_options)}.")
+        return engine
+
+    @property
+    def chunk_size(self):
+        return self.BATCH_CHUNK_SIZE if self.engine == "batch" else self.CHUNK_SIZE
+
+    def compute_chunks(self):
+        for combination_index, combination in enumerate(self.combinations):
+            for start in range(0, self.set_length, self.chunk_size):
+                stop = min(start + self.chunk_size, self.set_length)
+                yield self.settings, combination_index, combination, range(start, stop)
+
+    def describe(self):
+        """
+        :return: dictionary describing the tournament (all that determines its results)
+        """
+        return {
+            "number_of_players": self.number_of_players,
+            "set_length": self.set_length,
+            "seed": self.seed,
+            "paired": self.paired,
+            "engine": self.engine,
+            "chunk_size": self.chunk_size,  # checkpoints count completed chunks
+            "strategies": [strategy[1] for strategy in self.strategies],
+            **({} if self.schedule == ALL
+               else {"schedule": self.schedule, "appearances": self.appearances}),
+            **({"early_resolution": True} if self.early_resolution else {}),
+            **({"max_rounds": self.max_rounds} if self.max_rounds != MAX_ROUNDS else {}),
+        }
+
+    def open_results_writer(self):
+        if self.results_file is None:
+            return
+        self.results_writer = ResultsWriter(self.results_file, append=self.resume)
+        if not self.resume:
+            self.results_writer.write_header(
+                number_of_combinations=self.number_of_combinations,
+                games_of_one_player=self.number_of_games_of_one_player,
+                parameters={strategy[1]: strategy[0].parameters for strategy in self.strategies},
+                **self.describe()
+            )
+
+    def read_checkpoint(self):
+        if self.checkpoint_file is None or not os.path.exists(self.checkpoint_file):
+            raise ValueError("There is no checkpoint to resume the tournament from.")
+        with open(self.checkpoint_file, encoding="utf-8") as file:
+            return json.load(file)
+
+    def restore_checkpoint(self, checkpoint):
+        if checkpoint["tournament"] != self.describe():
+            raise ValueError("The checkpoint belongs to a different tournament.")
+        self.completed_chunks = checkpoint["completed_chunks"]
+        self.wins.update(checkpoint["wins"])
+        self.number_of_games_by_players.update(checkpoint["number_of_games_by_players"])
+        self.number_of_ties = checkpoint["number_of_ties"]
+        self.ratings.restore(checkpoint["ratings"], checkpoint["rated_games"])
+        self.matrices.restore(checkpoint["matrices"])
+        self.checkpoint = checkpoint
+
+    def save_progress(self):
+        """
+        Remember the progress after a chunk was merged
+        and write it to the checkpoint file from time to time.
+        """
+        self.completed_chunks += 1
+        self.checkpoint = {
+            "tournament": self.describe(),
+            "completed_chunks": self.completed_chunks,
+            "wins": dict(self.wins),
+            "number_of_games_by_players": dict(self.number_of_games_by_players),
+            "number_of_ties": self.number_of_ties,
+            "ratings": self.ratings.to_dict(),
+            "rated_games": self.ratings.number_of_games,
+            "matrices": self.matrices.to_dict(),
+        }
+        if time.monotonic() - self.last_checkpoint_time >= self.CHECKPOINT_INTERVAL:
+            if self.results_writer is not None:
+                self.results_writer.flush()  # the results must not lag behind the checkpoint
+            if self.trace_writer is not None:
+                self.trace_writer.flush()
+            if self.dataset_writer is not None:
+                self.dataset_writer.flush()
+            if self.ties_writer is not None:
+                self.ties_writer.flush()
+            self.write_checkpoint()
+
+    def remove_checkpoint(self):
+        if self.checkpoint_file is not None and os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
+
+    def write_checkpoint(self):
+        """
+        Write the progress, the writers must be flushed before.
+        """
+        if self.checkpoint_file is None or self.checkpoint is None:
+            return
+        if self.trace_writer is not None:
+            self.checkpoint["trace_offset"] = self.trace_writer.offset
+        if self.dataset_writer is not None:
+            self.checkpoint["dataset_parts"] = self.dataset_writer.number_of_parts
+        if self.ties_writer is not None:
+            self.checkpoint["ties_parts"] = self.ties_writer.number_of_parts
+        temporary_file = self.checkpoint_file + ".tmp"
+        with open(temporary_file, "w", encoding="utf-8") as file:
+            json.dump(self.checkpoint, file, ensure_ascii=False)
+        os.replace(temporary_file, self.checkpoint_file)  # never leave a half-written checkpoint
+        self.last_checkpoint_time = time.monotonic()
+
+    def merge_results(self, chunk, result: ChunkResult):
+        for player, count in result.wins.items():
+            self.wins[player] += count
+        for player, count in result.number_of_games_by_players.items():
+            self.number_of_games_by_players[player] += count
+        self.number_of_ties += result.number_of_ties
+        names = [player[1] for player in chunk[2]]
+        for places in result.places.tolist():
+            self.ratings.update(names, places)
+        self.matrices.merge(result.matrices, [self.strategy_indices[name] for name in names])
+        if result.profiler is not None:
+            self.profiler.merge(result.profiler)
+
+        if self.results_writer is not None:
+            settings, combination_index, combination, game_indices = chunk
+            self.results_writer.write_chunk(
+                combination_index, [player[1] for player in combination], game_indices,
+                result.wins, result.number_of_games_by_players, result.number_of_ties,
+                self.ratings.to_dict([player[1] for player in combination])
+            )
+        if self.trace_writer is not None:
+            for trace in result.traces:
+                self.trace_writer.write(trace)
+        if self.dataset_writer is not None:
+            settings, combination_index, combination, game_indices = chunk
+            result.games["strategies"] = [self.strategy_indices[player[1]] for player in combination]
+            self.dataset_writer.write(result.games)
+        if self.ties_writer is not None:
+            self.ties_writer.write(result.snapshots)
+
+        self.save_progress()
 
     def compute_combinations(self):
-        return itertools.combinations(self.strategies, self.number_of_players)
+        if self.schedule == ALL:
+            blocks = all_combinations(len(self.strategies), self.number_of_players)
+        elif self.schedule in (DESIGN, RANDOM):
+            blocks = block_design(len(self.strategies), self.number_of_players, self.appearances,
+                                  random.Random(derive_seed(self.seed, "schedule")),
+                                  balance_pairs=self.schedule == DESIGN)
+        else:
+            raise ValueError(f"Unknown schedule: {self.schedule}")
+        return (tuple(self.strategies[index] for index in block) for block in blocks)
 
     def compute_number_of_combinations(self):
+        if self.schedule != ALL:
+            self.combinations = list(self.combinations)
+            return len(self.combinations)
         return math.factorial(len(self.strategies)) \
                // math.factorial(self.number_of_players) \
                // math.factorial(len(self.strategies) - self.number_of_players)
 
     def compute_number_of_games_of_one_player(self):
+        """
+        :return: number of games of every strategy (the least one if they differ)
+        """
+        if self.schedule != ALL:
+            return self.appearances * self.set_length
         return math.factorial(len(self.strategies) - 1) \
                 // math.factorial(self.number_of_players - 1) \
                 // math.factorial(len(self.strategies) - self.number_of_players) \
@@ -69,6 +605,9 @@ class Tournament:
         print(f"The tournament will consist of {self.total_number_of_games} "
               f"({self.number_of_combinations} combinations * {self.set_length} rounds).")
         print(f"Each player will play {self.number_of_games_of_one_player} games.")
+        print(f"Seed: {self.seed}, workers: {self.workers}, engine: {self.engine}.")
+        if self.completed_chunks:
+            print(f"Resuming after {self.completed_chunks} finished chunks.")
         print("Starting to play.")
 
     def print_results(self):
@@ -77,8 +616,21 @@ class Tournament:
         print(f"There were {self.number_of_ties} ties in total,"
               f"that's {ties_percentage}% of the all games.")
 
+        self.print_ranks()
+
+        print("\nThe ratings (skill mu +- uncertainty sigma, ranked by mu - 3 sigma) are:")
+        for player, rating in self.ratings.ranks:
+            print(f"{player}: {rating.mu:.2f} +- {rating.sigma:.2f} ({rating.conservative:.2f})")
+
+    def ranking(self):
+        """
+        :return: names of the strategies from the best one
+        """
+        return sorted(self.wins, key=self.wins.get, reverse=True)
+
+    def print_ranks(self):
         print("\nThe ranks are:")
-        for player in sorted(self.wins, key=self.wins.get, reverse=True):
+        for player in self.ranking():
             score = self.wins[player]
             game_played = self.number_of_games_by_players[player]
             print(f"{player}: {score} ({100 * score // game_played}%, {game_played} non-tie games)")
@@ -90,7 +642,7 @@ class Tournament:
         file.write(str(self.set_length) + "\n")
         file.write(str(self.number_of_games_of_one_player) + "\n\n")
 
-        for player in sorted(self.wins, key=self.wins.get, reverse=True):
+        for player in self.ranking():
             score = self.wins[player]
             game_played = self.number_of_games_by_players[player]
             file.write(f"{player} {score} {game_played}\n")
@@ -98,18 +650,263 @@ class Tournament:
         file.close()
 
 
-Tournament(3, 10, [
-    [ThresholdStrategy(0), "Threshold0"],
-    [ThresholdStrategy(500), "Threshold500"],
-    [ThresholdStrategy(1000), "Threshold1000"],
-    [ThresholdStrategy(2000), "Threshold2000"],
-    [ThresholdStrategy(3000), "Threshold3000"],
-    [ThresholdStrategy(4000), "Threshold4000"],
-    [ThresholdStrategy(5000), "Threshold5000"],
-    [ThresholdStrategy(10000), "Threshold10000"],
-    [ThresholdStrategy(15000), "Threshold15000"],
-    [ThresholdStrategy(20000), "Threshold20000"],
-    [ThresholdStrategy(60000), "Threshold60000"],
+def wilson_interval(successes, trials, z):
+    """
+    Wilson score interval of a success rate.
+    :param z: quantile of the normal distribution for the desired confidence
+    :return: tuple (lower bound, upper bound)
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    rate = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (rate + z * z / (2 * trials)) / denominator
+    half_width = z * math.sqrt(rate * (1 - rate) / trials + z * z / (4 * trials * trials)) \
+        / denominator
+    return centre - half_width, centre + half_width
+
+
+class AdaptiveTournament(Tournament):
+    """
+    A tournament that stops as soon as the ranking is statistically settled.
+    The combinations are played in stages of one chunk of games.
+    After every stage, a confidence interval of the win rate of every strategy
+    is computed and two strategies next to each other in the ranking are close
+    if their intervals overlap. The next stage plays only the combinations
+    in which both strategies of some close pair meet.
+    The tournament stops when there are no close strategies left or when
+    those combinations have played all their games (set length is the maximum).
+    Adaptive tournaments are not checkpointed, their chunks depend on the results.
+    """
+
+    def __init__(self, number_of_players, set_length, strategies, confidence=.95, **kwargs):
+        if kwargs.get("resume"):
+            raise ValueError("An adaptive tournament can't be resumed.")
+        kwargs["checkpoint_file"] = None
+        super().__init__(number_of_players, set_length, strategies, **kwargs)
+        self.confidence = confidence
+        self.z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+        self.combinations = list(self.combinations)
+        self.games_played = [0] * self.number_of_combinations
+        self.settled = False
+
+    def play_chunks(self, map_chunks):
+        active_combinations = range(self.number_of_combinations)
+        while active_combinations:
+            chunks = [self.next_chunk(combination_index)
+                      for combination_index in active_combinations]
+            for chunk, result in zip(chunks, map_chunks(play_chunk, chunks)):
+                self.merge_results(chunk, result)
+                self.games_played[chunk[1]] = chunk[3].stop
+
+            close_pairs = self.find_close_pairs()
+            self.settled = not close_pairs
+            active_combinations = [
+                combination_index
+                for combination_index, combination in enumerate(self.combinations)
+                if self.games_played[combination_index] < self.set_length
+                and self.separates_close_pair(combination, close_pairs)
+            ]
+        self.total_number_of_games = sum(self.games_played)
+
+    def next_chunk(self, combination_index):
+        start = self.games_played[combination_index]
+        stop = min(start + self.chunk_size, self.set_length)
+        return self.settings, combination_index, self.combinations[combination_index], \
+            range(start, stop)
+
+    def compute_intervals(self):
+        return {
+            player: wilson_interval(self.wins[player], self.number_of_games_by_players[player],
+                                    self.z)
+            for player in self.wins
+        }
+
+    def find_close_pairs(self):
+        """
+        :return: list of pairs of strategies next to each other in the ranking
+                 whose confidence intervals of the win rate overlap
+        """
+        intervals = self.compute_intervals()
+        ranking = sorted(intervals, key=lambda player: sum(intervals[player]), reverse=True)
+        return [
+            (better, worse)
+            for better, worse in zip(ranking, ranking[1:])
+            if intervals[better][0] <= intervals[worse][1]
+        ]
+
+    @staticmethod
+    def separates_close_pair(combination, close_pairs):
+        names = {player[1] for player in combination}
+        return any(better in names and worse in names for better, worse in close_pairs)
+
+    def ranking(self):
+        """
+        Strategies play different numbers of games, so they are ranked by their win rates
+        (the centres of their confidence intervals, as in find_close_pairs).
+        """
+        intervals = self.compute_intervals()
+        return sorted(intervals, key=lambda player: sum(intervals[player]), reverse=True)
+
+    def print_ranks(self):
+        intervals = self.compute_intervals()
+        print(f"\nThe ranks by win rates ({100 * self.confidence:g}% confidence intervals) are:")
+        for player in self.ranking():
+            score = self.wins[player]
+            game_played = self.number_of_games_by_players[player]
+            lower, upper = intervals[player]
+            print(f"{player}: {score} ({100 * score / max(game_played, 1):.1f}%, "
+                  f"{100 * lower:.1f}-{100 * upper:.1f}%, {game_played} non-tie games)")
+
+    def print_results(self):
+        super().print_results()
+        if self.settled:
+            print(f"\nThe ranking settled at {100 * self.confidence:g}% confidence "
+                  f"after {self.total_number_of_games} games.")
+        else:
+            print(f"\nThe ranking did not settle at {100 * self.confidence:g}% confidence "
+                  f"within {self.set_length} games per combination.")
+
+
+class SwissTournament(Tournament):
+    """
+    A tournament played in rounds, Swiss-style.
+    In every round, every strategy plays one combination of games with
+    the strategies with the most similar win rates so far (the first round
+    is random), so strong strategies are compared with each other more often.
+    Swiss tournaments are not checkpointed, their combinations depend on the results.
+    """
+
+    def __init__(self, number_of_players, set_length, strategies, rounds=10, **kwargs):
+        """
+        :param rounds: number of rounds (combinations of every strategy)
+        """
+        if kwargs.get("resume"):
+            raise ValueError("A Swiss tournament can't be resumed.")
+        kwargs["checkpoint_file"] = None
+        kwargs["schedule"] = SWISS
+        kwargs["appearances"] = rounds
+        self.rounds = rounds
+        super().__init__(number_of_players, set_length, strategies, **kwargs)
+
+    def compute_combinations(self):
+        return []  # chosen round by round
+
+    def compute_number_of_combinations(self):
+        return self.rounds * math.ceil(len(self.strategies) / self.number_of_players)
+
+    def play_chunks(self, map_chunks):
+        rng = random.Random(derive_seed(self.seed, "schedule"))
+        for _ in range(self.rounds):
+            blocks = swiss_round(self.compute_win_rates(), self.number_of_players, rng)
+            chunks = []
+            for block in blocks:
+                combination_index = len(self.combinations)
+                combination = tuple(self.strategies[index] for index in block)
+                self.combinations.append(combination)
+                for start in range(0, self.set_length, self.chunk_size):
+                    stop = min(start + self.chunk_size, self.set_length)
+                    chunks.append((self.settings, combination_index, combination,
+                                   range(start, stop)))
+            for chunk, result in zip(chunks, map_chunks(play_chunk, chunks)):
+                self.merge_results(chunk, result)
+
+    def compute_win_rates(self):
+        return [
+            self.wins[strategy[1]] / self.number_of_games_by_players[strategy[1]]
+            if self.number_of_games_by_players[strategy[1]] else 0
+            for strategy in self.strategies
+        ]
+
+
+THRESHOLDS = [0, 500, 1000, 2000, 3000, 4000, 5000, 10000, 15000, 20000, 60000]
+
+STRATEGIES = [
+    *([ThresholdStrategy(threshold), f"Threshold{threshold}"] for threshold in THRESHOLDS),
     [NoCheapHorsesStrategy(), "NoCheapHorses"],
     [ScoreStrategy(), "ScoreStrategy"],
-]).start()
+]
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Run a tournament of all strategies.")
+    parser.add_argument("--set-length", type=int, default=10,
+                        help="number of games of every combination of players")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes to play the games in")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed making the tournament reproducible")
+    parser.add_argument("--paired", action="store_true",
+                        help="use the same seeds for the n-th game of every combination")
+    parser.add_argument("--log-file", default=None,
+                        help="write structured logs of all games to this file (JSON lines)")
+    parser.add_argument("--log-level", type=int, default=logger.EVENT,
+                        help=f"lowest level of logged messages (events {logger.EVENT}, "
+                             f"states {logger.STATE}, results {logger.RESULT})")
+    parser.add_argument("--engine", choices=["reference", "batch", "auto"], default="reference",
+                        help="game engine, batch can play only strategies deciding in batches, "
+                             "auto chooses it when it's faster (sets of at least 500 games)")
+    parser.add_argument("--results", default="../stats.jsonl",
+                        help="file the results are streamed to (JSON lines)")
+    parser.add_argument("--checkpoint", default="../checkpoint.json",
+                        help="file the progress of the tournament is saved to")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted tournament from the checkpoint")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="stop when the ranking is settled (set length is the maximum)")
+    parser.add_argument("--schedule", choices=SCHEDULES, default=ALL,
+                        help="combinations of players that play: all of them, a balanced "
+                             "design, random or Swiss rounds by the current win rates")
+    parser.add_argument("--appearances", type=int, default=10,
+                        help="number of combinations (or Swiss rounds) of every strategy")
+    parser.add_argument("--confidence", type=float, default=.95,
+                        help="confidence of the ranking of an adaptive tournament")
+    parser.add_argument("--max-rounds", type=int, default=MAX_ROUNDS,
+                        help="number of rounds after which a game is a tie")
+    parser.add_argument("--snapshot-interval", type=int, default=None,
+                        help="take snapshots of the state of games every this many rounds "
+                             "and save the last ones of the tied games")
+    parser.add_argument("--snapshot-capacity", type=int, default=20,
+                        help="number of the last snapshots kept for every game")
+    parser.add_argument("--ties", default="../ties",
+                        help="directory the snapshots of the tied games are written to")
+    parser.add_argument("--early-resolution", action="store_true",
+                        help="end games whose outcome is almost certain early")
+    parser.add_argument("--profile", action="store_true",
+                        help="print time spent in the phases of games")
+    parser.add_argument("--profile-file", default=None,
+                        help="write time spent in the phases of games to this file (JSON)")
+    parser.add_argument("--trace-file", default=None,
+                        help="record all games to this file, ./replay.py replays them")
+    parser.add_argument("--dataset", default="../games",
+                        help="directory the outcomes of all games are written to")
+    parser.add_argument("--matrices", default="../matrices.npz",
+                        help="file the head-to-head and seat matrices are written to")
+    arguments = parser.parse_args()
+    if arguments.adaptive and arguments.schedule == SWISS:
+        parser.error("an adaptive tournament can't be played in Swiss rounds")
+    return arguments
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    options = dict(workers=arguments.workers, seed=arguments.seed, paired=arguments.paired,
+                   log_file=arguments.log_file, log_level=arguments.log_level,
+                   engine=arguments.engine, results_file=arguments.results,
+                   profile=arguments.profile or arguments.profile_file is not None,
+                   profile_file=arguments.profile_file, trace_file=arguments.trace_file,
+                   dataset_directory=arguments.dataset, matrices_file=arguments.matrices,
+                   early_resolution=arguments.early_resolution, max_rounds=arguments.max_rounds,
+                   snapshot_interval=arguments.snapshot_interval,
+                   snapshot_capacity=arguments.snapshot_capacity, ties_directory=arguments.ties,
+                   checkpoint_file=arguments.checkpoint, resume=arguments.resume,
+                   schedule=arguments.schedule, appearances=arguments.appearances)
+    if arguments.schedule == SWISS:
+        tournament = SwissTournament(3, arguments.set_length, STRATEGIES,
+                                     rounds=arguments.appearances, **options)
+    elif arguments.adaptive:
+        tournament = AdaptiveTournament(3, arguments.set_length, STRATEGIES,
+                                        confidence=arguments.confidence, **options)
+    else:
+        tournament = Tournament(3, arguments.set_length, STRATEGIES, **options)
+    tournament.start()